@@ -34,10 +34,13 @@ try:
 except Exception as e:
     print(f"Requirements installation failed: {e}")
 
+# Frontend extensions (media preview player)
+WEB_DIRECTORY = "./web"
+
 # Import the actual nodes
 try:
     from .ytdl_nodes import NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS
-    __all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
+    __all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS', 'WEB_DIRECTORY']
     print("✅ YTDL nodes loaded successfully!")
 except Exception as e:
     print(f"❌ Failed to import YTDL nodes: {e}")
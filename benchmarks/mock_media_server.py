@@ -0,0 +1,277 @@
+import os
+import random
+import shutil
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+MIME_TYPES = {
+    '.mp4': 'video/mp4',
+    '.m4a': 'audio/mp4',
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+    '.mpd': 'application/dash+xml',
+    '.m4s': 'video/iso.segment',
+    '.html': 'text/html; charset=utf-8',
+}
+HOP_BY_HOP_HEADERS = ('connection', 'keep-alive', 'proxy-connection', 'proxy-authorization', 'te',
+                      'trailer', 'transfer-encoding', 'upgrade')
+FIXTURE_ENTRYPOINTS = {
+    'mp4': 'video.mp4',
+    'hls': 'index.m3u8',
+    'dash': 'manifest.mpd',
+}
+def generate_fixtures(fixture_dir: str, duration: float = 10.0, overwrite: bool = False) -> dict:
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError("ffmpeg is required to generate benchmark fixtures")
+    sources = [
+        '-f', 'lavfi', '-i', f'testsrc=duration={duration}:size=320x240:rate=25',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=44100:duration={duration}',
+    ]
+    codecs = ['-c:v', 'libx264', '-preset', 'ultrafast', '-g', '50', '-c:a', 'aac', '-b:a', '96k', '-shortest']
+    jobs = {
+        'mp4': ['-movflags', '+faststart'],
+        'hls': ['-f', 'hls', '-hls_time', '2', '-hls_playlist_type', 'vod'],
+        'dash': ['-f', 'dash', '-seg_duration', '2', '-use_template', '1', '-use_timeline', '0'],
+    }
+    paths = {}
+    for kind, extra in jobs.items():
+        kind_dir = os.path.join(fixture_dir, kind)
+        target = os.path.join(kind_dir, FIXTURE_ENTRYPOINTS[kind])
+        paths[kind] = target
+        if os.path.exists(target) and not overwrite:
+            continue
+        os.makedirs(kind_dir, exist_ok=True)
+        subprocess.run(['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', *sources, *codecs, *extra, target],
+                       check=True, cwd=kind_dir)
+    return paths
+class FaultInjector:
+    def __init__(self, latency_ms: float = 0.0, rate_429: float = 0.0, failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.rate_429 = rate_429
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'bytes_sent': 0, 'injected_429': 0, 'injected_failures': 0}
+    def decide(self) -> Optional[int]:
+        with self.lock:
+            self.stats['requests'] += 1
+            roll = self.random.random()
+            if roll < self.rate_429:
+                self.stats['injected_429'] += 1
+                return 429
+            if roll < self.rate_429 + self.failure_rate:
+                self.stats['injected_failures'] += 1
+                return 503
+        return None
+    def count_bytes(self, sent: int):
+        with self.lock:
+            self.stats['bytes_sent'] += sent
+class MockMediaHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fixture_dir = ''
+    faults = FaultInjector()
+    def log_message(self, format, *args):
+        pass
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass
+    def resolve_path(self, url_path: str) -> Optional[str]:
+        url_path = url_path.split('?', 1)[0].lstrip('/')
+        parts = url_path.split('/')
+        if len(parts) != 2 or parts[0] not in FIXTURE_ENTRYPOINTS:
+            return None
+        kind, name = parts
+        if name.startswith('item'):
+            name = FIXTURE_ENTRYPOINTS[kind]
+        candidate = os.path.normpath(os.path.join(self.fixture_dir, kind, name))
+        if not candidate.startswith(os.path.normpath(self.fixture_dir) + os.sep) or not os.path.isfile(candidate):
+            return None
+        return candidate
+    def generic_page(self, url_path: str) -> Optional[bytes]:
+        name = url_path.split('?', 1)[0].rsplit('/', 1)[-1]
+        if not url_path.startswith('/page/') or not name.endswith('.html'):
+            return None
+        item = name[:-len('.html')]
+        return (
+            f"<!DOCTYPE html><html><head><title>Generic {item}</title></head><body>"
+            f"<video controls><source src=\"/mp4/{item}.mp4\" type=\"video/mp4\"></video>"
+            f"</body></html>"
+        ).encode('utf-8')
+    def send_simple(self, status: int, body: bytes = b'', content_type: str = 'text/plain', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD' and body:
+            self.wfile.write(body)
+            self.faults.count_bytes(len(body))
+    def do_HEAD(self):
+        self.do_GET()
+    def do_GET(self):
+        if self.faults.latency_ms > 0:
+            time.sleep(self.faults.latency_ms / 1000.0)
+        injected = self.faults.decide()
+        if injected == 429:
+            return self.send_simple(429, b'Too Many Requests', headers={'Retry-After': '1'})
+        if injected:
+            return self.send_simple(injected, b'Service Unavailable')
+        page = self.generic_page(self.path)
+        if page is not None:
+            return self.send_simple(200, page, MIME_TYPES['.html'])
+        file_path = self.resolve_path(self.path)
+        if file_path is None:
+            return self.send_simple(404, b'Not Found')
+        size = os.path.getsize(file_path)
+        start, end = 0, size - 1
+        status = 200
+        range_header = self.headers.get('Range')
+        if range_header and range_header.startswith('bytes='):
+            first, _, last = range_header[len('bytes='):].split(',')[0].partition('-')
+            try:
+                if first:
+                    start = int(first)
+                    end = min(int(last), size - 1) if last else size - 1
+                else:
+                    start = max(size - int(last), 0)
+            except ValueError:
+                return self.send_simple(416, b'', headers={'Content-Range': f'bytes */{size}'})
+            if start > end or start >= size:
+                return self.send_simple(416, b'', headers={'Content-Range': f'bytes */{size}'})
+            status = 206
+        length = end - start + 1
+        self.send_response(status)
+        self.send_header('Content-Type', MIME_TYPES.get(os.path.splitext(file_path)[1], 'application/octet-stream'))
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        remaining = length
+        try:
+            with open(file_path, 'rb') as f:
+                f.seek(start)
+                while remaining > 0:
+                    chunk = f.read(min(65536, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        self.faults.count_bytes(length - remaining)
+class MockMediaServer:
+    def __init__(self, fixture_dir: str, faults: Optional[FaultInjector] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        handler = type('BoundMockMediaHandler', (MockMediaHandler,), {
+            'fixture_dir': os.path.abspath(fixture_dir),
+            'faults': faults or FaultInjector(),
+        })
+        self.faults = handler.faults
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    def url_for(self, kind: str, item: int) -> str:
+        if kind == 'generic':
+            return f"{self.base_url}/page/item{item}.html"
+        extension = os.path.splitext(FIXTURE_ENTRYPOINTS[kind])[1]
+        return f"{self.base_url}/{kind}/item{item}{extension}"
+    def __enter__(self):
+        self.thread.start()
+        return self
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+class StandInProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    faults = FaultInjector()
+    def log_message(self, format, *args):
+        pass
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass
+    def send_simple(self, status: int, body: bytes = b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD' and body:
+            self.wfile.write(body)
+    def do_HEAD(self):
+        self.do_GET()
+    def do_GET(self):
+        import http.client
+        from urllib.parse import urlsplit
+        if self.faults.latency_ms > 0:
+            time.sleep(self.faults.latency_ms / 1000.0)
+        injected = self.faults.decide()
+        if injected == 429:
+            return self.send_simple(429, b'Too Many Requests', headers={'Retry-After': '1'})
+        if injected:
+            return self.send_simple(injected, b'Service Unavailable')
+        target = urlsplit(self.path)
+        if target.scheme != 'http' or not target.hostname:
+            return self.send_simple(400, b'Only absolute http:// URLs are proxied')
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        try:
+            try:
+                connection.request(self.command, f"{target.path or '/'}{'?' + target.query if target.query else ''}",
+                                   headers=headers)
+                response = connection.getresponse()
+            except OSError as e:
+                return self.send_simple(502, str(e).encode('utf-8'))
+            self.send_response(response.status)
+            for key, value in response.getheaders():
+                if key.lower() not in HOP_BY_HOP_HEADERS:
+                    self.send_header(key, value)
+            if response.getheader('Content-Length') is None:
+                self.close_connection = True
+            self.end_headers()
+            if self.command == 'HEAD':
+                return
+            while True:
+                chunk = response.read(65536)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                self.faults.count_bytes(len(chunk))
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            connection.close()
+class StandInProxy:
+    def __init__(self, faults: Optional[FaultInjector] = None, host: str = '127.0.0.1', port: int = 0):
+        handler = type('BoundStandInProxyHandler', (StandInProxyHandler,), {'faults': faults or FaultInjector()})
+        self.faults = handler.faults
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    def __enter__(self):
+        self.thread.start()
+        return self
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
@@ -0,0 +1,212 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_media_server import FaultInjector, MockMediaServer, StandInProxy, generate_fixtures
+from ytdl_nodes import YTDLDownloader, YTDLPreview, get_extraction_pool, summarize_samples
+SCENARIOS = ['mp4', 'hls', 'dash', 'generic']
+def peak_rss_mb() -> dict:
+    try:
+        import resource
+    except ImportError:
+        return {}
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor, 1),
+    }
+def quiet(enabled: bool):
+    return contextlib.redirect_stdout(io.StringIO()) if enabled else contextlib.nullcontext()
+def run_download_scenario(server: MockMediaServer, kind: str, args, output_dir: str) -> dict:
+    links = [server.url_for(kind, item) for item in range(args.items)]
+    requests_before = dict(server.faults.stats)
+    started = time.perf_counter()
+    with quiet(not args.verbose):
+        files_output, info_output = YTDLDownloader().download_media(
+            links, output_dir, args.media_type, args.audio_format, 'mp4', 'best',
+            False, '', '', False, 'none', False, True,
+            custom_filename="%(title)s.%(ext)s",
+            progress_interval=5.0,
+            profile_mode='timers',
+            proxies=','.join(proxy.url for proxy in args.stand_in_proxies),
+        )
+    wall = time.perf_counter() - started
+    info = json.loads(info_output)
+    records = info.get('downloads', [])
+    latencies = [sum(slot['wall'] for slot in record.get('timing', {}).values()) for record in records]
+    total_bytes = sum(record.get('file_size', 0) for record in records if record.get('status') == 'success')
+    server_stats = {key: server.faults.stats[key] - requests_before.get(key, 0) for key in server.faults.stats}
+    return {
+        'scenario': kind,
+        'items': len(links),
+        'successful': info['summary']['successful'],
+        'failed': info['summary']['failed'],
+        'wall_seconds': round(wall, 3),
+        'items_per_second': round(len(links) / wall, 3) if wall > 0 else 0.0,
+        'mb_per_second': round(total_bytes / (1024 * 1024) / wall, 3) if wall > 0 else 0.0,
+        'latency_seconds': summarize_samples(latencies),
+        'stages': info.get('timing', {}).get('stages', {}),
+        'server': server_stats,
+        'identities': info['summary'].get('identities', []),
+        'peak_rss_mb': peak_rss_mb(),
+        'files': [path for path in files_output.split('\n') if path],
+    }
+def run_extraction_scenario(links, source: str, args) -> list:
+    import yt_dlp
+    ydl_opts = {'quiet': True, 'no_warnings': True, 'socket_timeout': 30}
+    results = []
+    for workers in args.extraction_workers:
+        startup = 0.0
+        cpu_started = time.process_time()
+        with quiet(not args.verbose):
+            if workers:
+                startup_started = time.perf_counter()
+                pool = get_extraction_pool(ydl_opts, workers)
+                startup = time.perf_counter() - startup_started
+                started = time.perf_counter()
+                futures = [pool.submit_extract(link) for link in links]
+                successful = sum(1 for future in futures if pool.result(future)[0])
+            else:
+                downloader = YTDLDownloader()
+                started = time.perf_counter()
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    successful = sum(1 for link in links if downloader.safe_extract_info(ydl, link, download=False))
+        wall = time.perf_counter() - started
+        results.append({
+            'scenario': 'extract',
+            'source': source,
+            'workers': workers,
+            'items': len(links),
+            'successful': successful,
+            'startup_seconds': round(startup, 3),
+            'wall_seconds': round(wall, 3),
+            'items_per_second': round(len(links) / wall, 3) if wall > 0 else 0.0,
+            'parent_cpu_seconds': round(time.process_time() - cpu_started, 3),
+            'peak_rss_mb': peak_rss_mb(),
+        })
+    return results
+def run_preview_scenario(files, args) -> dict:
+    if not files:
+        return {'scenario': 'preview', 'skipped': 'no downloaded files'}
+    try:
+        import torch
+    except ImportError:
+        return {'scenario': 'preview', 'skipped': 'torch not installed'}
+    downloaded_files = '\n'.join(files)
+    node = YTDLPreview()
+    latencies = []
+    started = time.perf_counter()
+    for index in range(len(files)):
+        item_started = time.perf_counter()
+        with quiet(not args.verbose):
+            node.preview_media(downloaded_files, index)
+        latencies.append(time.perf_counter() - item_started)
+    wall = time.perf_counter() - started
+    return {
+        'scenario': 'preview',
+        'items': len(files),
+        'wall_seconds': round(wall, 3),
+        'items_per_second': round(len(files) / wall, 3) if wall > 0 else 0.0,
+        'latency_seconds': summarize_samples(latencies),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline YTDL benchmarks against a local mock media server")
+    parser.add_argument('--scenarios', nargs='+', default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument('--items', type=int, default=5, help="Number of distinct URLs per scenario")
+    parser.add_argument('--duration', type=float, default=10.0, help="Fixture duration in seconds")
+    parser.add_argument('--media-type', default='audio_only', choices=['audio_only', 'video'])
+    parser.add_argument('--audio-format', default='m4a', choices=['mp3', 'wav', 'm4a', 'flac', 'ogg'])
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Latency added to every request")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--fixtures', default=None, help="Fixture cache directory (default: temporary)")
+    parser.add_argument('--skip-preview', action='store_true')
+    parser.add_argument('--skip-download', action='store_true', help="Only run the extraction scenario")
+    parser.add_argument('--extraction-workers', type=int, nargs='*', default=[],
+                        help="Measure extraction throughput for these process-pool sizes (0 = in-process), e.g. 0 1 2 4")
+    parser.add_argument('--extract-urls', default=None,
+                        help="Also measure extraction of the real URLs in this file (one per line; needs network)")
+    parser.add_argument('--proxies', type=int, default=0,
+                        help="Route downloads through this many local stand-in proxies (one identity each)")
+    parser.add_argument('--throttled-proxies', type=int, default=0,
+                        help="How many of the stand-in proxies answer with 429 at --proxy-rate-429")
+    parser.add_argument('--proxy-rate-429', type=float, default=1.0,
+                        help="Fraction of requests the throttled stand-in proxies answer with 429")
+    parser.add_argument('--output', default=None, help="Write the JSON report to this path")
+    parser.add_argument('--verbose', action='store_true', help="Show downloader console output")
+    args = parser.parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix='ytdl_bench_')
+    fixture_dir = args.fixtures or os.path.join(work_dir, 'fixtures')
+    try:
+        print(f"🎞️ Generating fixtures in {fixture_dir}")
+        generate_fixtures(fixture_dir, args.duration)
+        faults = FaultInjector(args.latency_ms, args.rate_429, args.failure_rate, args.seed)
+        results = []
+        with MockMediaServer(fixture_dir, faults) as server, contextlib.ExitStack() as proxy_stack:
+            print(f"🌐 Mock media server at {server.base_url}")
+            args.stand_in_proxies = [
+                proxy_stack.enter_context(StandInProxy(FaultInjector(
+                    rate_429=args.proxy_rate_429 if index < args.throttled_proxies else 0.0, seed=args.seed + index)))
+                for index in range(args.proxies)
+            ]
+            if args.stand_in_proxies:
+                print(f"🔀 {len(args.stand_in_proxies)} stand-in proxies "
+                      f"({min(args.throttled_proxies, args.proxies)} throttled)")
+            for kind in args.scenarios:
+                if args.extraction_workers:
+                    print(f"🧵 Extraction throughput for {kind} with workers {args.extraction_workers}")
+                    links = [server.url_for(kind, item) for item in range(args.items)]
+                    for result in run_extraction_scenario(links, kind, args):
+                        results.append(result)
+                        print(f"   {result['workers']} worker(s): {result['items_per_second']} items/s "
+                              f"(parent CPU {result['parent_cpu_seconds']}s)")
+                if args.skip_download:
+                    continue
+                print(f"🏁 Running {kind} scenario ({args.items} items)")
+                proxy_before = [dict(proxy.faults.stats) for proxy in args.stand_in_proxies]
+                result = run_download_scenario(server, kind, args, os.path.join(work_dir, 'out', kind))
+                results.append(result)
+                print(f"   {result['successful']}/{result['items']} ok in {result['wall_seconds']}s "
+                      f"({result['items_per_second']} items/s, p90 {result['latency_seconds']['p90']}s)")
+                if args.stand_in_proxies:
+                    result['proxies'] = [
+                        dict({key: proxy.faults.stats[key] - before[key] for key in before}, url=proxy.url)
+                        for proxy, before in zip(args.stand_in_proxies, proxy_before)
+                    ]
+                if not args.skip_preview:
+                    preview = run_preview_scenario(result['files'], args)
+                    preview['source'] = kind
+                    results.append(preview)
+        if args.extract_urls and args.extraction_workers:
+            links = [line.strip() for line in open(args.extract_urls, encoding='utf-8')
+                     if line.strip() and not line.startswith('#')]
+            print(f"🧵 Extraction throughput for {len(links)} URL(s) from {args.extract_urls}")
+            for result in run_extraction_scenario(links, args.extract_urls, args):
+                results.append(result)
+                print(f"   {result['workers']} worker(s): {result['items_per_second']} items/s "
+                      f"(parent CPU {result['parent_cpu_seconds']}s)")
+        report = {
+            'config': {k: v for k, v in vars(args).items() if k not in ('output', 'verbose', 'stand_in_proxies')},
+            'results': results,
+        }
+        report_json = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(report_json)
+            print(f"📄 Report written to {args.output}")
+        else:
+            print(report_json)
+        return report
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import { app } from "../../scripts/app.js";
+import { api } from "../../scripts/api.js";
+
+// Plays the file selected in YTDL Preview straight from the /ytdl/media route. The browser only fetches the
+// byte ranges it needs (metadata, then whatever is played or seeked to) instead of the node decoding the file.
+function createPlayer(node) {
+    const container = document.createElement("div");
+    container.style.cssText = "display:flex;flex-direction:column;gap:4px;width:100%;";
+    const title = document.createElement("div");
+    title.style.cssText = "font:12px sans-serif;color:#ccc;overflow:hidden;text-overflow:ellipsis;white-space:nowrap;";
+    const holder = document.createElement("div");
+    const toggleLabel = document.createElement("label");
+    toggleLabel.style.cssText = "font:11px sans-serif;color:#aaa;display:flex;align-items:center;gap:4px;";
+    const toggle = document.createElement("input");
+    toggle.type = "checkbox";
+    toggleLabel.append(toggle, "Transcode for browser");
+    container.append(title, holder, toggleLabel);
+    const widget = node.addDOMWidget("ytdl_player", "ytdl_preview", container, {
+        serialize: false,
+        hideOnZoom: false,
+    });
+    widget.ytdl = { title, holder, toggle, media: null, element: null };
+    toggle.addEventListener("change", () => load(widget));
+    return widget;
+}
+
+function load(widget) {
+    const state = widget.ytdl;
+    const media = state.media;
+    if (!media) {
+        return;
+    }
+    const tag = media.type === "video" ? "video" : "audio";
+    if (!state.element || state.element.tagName.toLowerCase() !== tag) {
+        state.holder.replaceChildren();
+        state.element = document.createElement(tag);
+        state.element.controls = true;
+        state.element.preload = "metadata";
+        state.element.style.cssText = "width:100%;max-height:360px;background:#000;border-radius:6px;";
+        // Containers/codecs the browser can't play fall back to the on-the-fly transcode once
+        state.element.addEventListener("error", () => {
+            if (!state.toggle.checked && state.media) {
+                state.toggle.checked = true;
+                load(widget);
+            }
+        });
+        state.holder.append(state.element);
+    }
+    state.title.textContent = media.name;
+    state.element.src = api.apiURL(state.toggle.checked ? media.transcode_url : media.url);
+}
+
+app.registerExtension({
+    name: "ytdl.MediaPreview",
+    async beforeRegisterNodeDef(nodeType, nodeData) {
+        if (nodeData.name !== "YTDLPreview") {
+            return;
+        }
+        const onExecuted = nodeType.prototype.onExecuted;
+        nodeType.prototype.onExecuted = function (message) {
+            onExecuted?.apply(this, arguments);
+            const media = message?.ytdl_media?.[0];
+            if (!media) {
+                return;
+            }
+            const widget = this.widgets?.find((w) => w.name === "ytdl_player") ?? createPlayer(this);
+            widget.ytdl.media = media;
+            widget.ytdl.toggle.checked = false;
+            load(widget);
+            this.setSize([Math.max(this.size[0], 320), Math.max(this.size[1], this.computeSize()[1])]);
+        };
+    },
+});
@@ -0,0 +1,61 @@
+import os
+import sys
+TRIMMED_INFO_KEYS = ('automatic_captions', 'heatmap', 'comments', 'thumbnails')
+_worker_ydl = None
+_worker_downloader = None
+def init_worker(ydl_opts: dict):
+    global _worker_ydl, _worker_downloader
+    import yt_dlp
+    from ytdl_nodes import YTDLDownloader
+    _worker_ydl = yt_dlp.YoutubeDL(dict(ydl_opts, quiet=True))
+    _worker_downloader = YTDLDownloader()
+def trim_info(info: dict, keep_subtitles: bool = False) -> dict:
+    info = _worker_ydl.sanitize_info(info)
+    for key in TRIMMED_INFO_KEYS:
+        if key == 'thumbnails' and info.get(key):
+            info[key] = info[key][-3:]
+        elif key == 'automatic_captions' and keep_subtitles:
+            continue
+        else:
+            info.pop(key, None)
+    if not keep_subtitles:
+        info.pop('subtitles', None)
+    if info.get('formats'):
+        info['formats'] = [f for f in info['formats'] if f.get('format_note') != 'storyboard']
+    return {k: v for k, v in info.items() if not k.startswith('__')}
+def extract(url: str, keep_subtitles: bool = False):
+    import time
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    try:
+        info = _worker_downloader.safe_extract_info(_worker_ydl, url, download=False, process=False)
+        if info and info.get('_type') in ('playlist', 'multi_video'):
+            info = {k: v for k, v in info.items() if k != 'entries'}
+            info['entries'] = None
+            return (_worker_ydl.sanitize_info(info), None,
+                    time.perf_counter() - started, time.process_time() - cpu_started)
+        info = _worker_downloader.resolve_link_info(_worker_ydl, info)
+        if not info:
+            return None, 'Failed to extract video information', time.perf_counter() - started, time.process_time() - cpu_started
+        if info.get('_type') in ('playlist', 'multi_video'):
+            return None, 'Nested playlists are not supported', time.perf_counter() - started, time.process_time() - cpu_started
+        return trim_info(info, keep_subtitles), None, time.perf_counter() - started, time.process_time() - cpu_started
+    except Exception as e:
+        return None, str(e), time.perf_counter() - started, time.process_time() - cpu_started
+def main():
+    import pickle
+    requests = sys.stdin.buffer
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    init_worker(pickle.load(requests))
+    pickle.dump(os.getpid(), responses)
+    responses.flush()
+    while True:
+        try:
+            url, keep_subtitles = pickle.load(requests)
+        except EOFError:
+            break
+        pickle.dump(extract(url, keep_subtitles), responses)
+        responses.flush()
+if __name__ == '__main__':
+    main()
@@ -55,6 +55,1537 @@ def parse_time_to_seconds(time_str: str) -> Optional[float]:
         print(f"⚠️ Could not parse time: {time_str}")
         print(f"💡 Use formats like: 30 (seconds), 1:30 (MM:SS), or 1:30:45 (HH:MM:SS)")
         return None
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.wma', '.opus')
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mkv', '.avi', '.mov', '.m4v', '.flv')
+AUDIO_CODEC_MAP = {
+    'mp3': ('libmp3lame', 'mp3'),
+    'wav': ('pcm_s16le', 'pcm_s16le'),
+    'flac': ('flac', 'flac'),
+    'm4a': ('aac', 'aac'),
+    'ogg': ('libvorbis', 'vorbis'),
+    'opus': ('libopus', 'opus'),
+}
+def split_file_list(downloaded_files: str) -> List[str]:
+    if not downloaded_files:
+        return []
+    return [path.strip() for path in downloaded_files.split('\n') if path.strip()]
+SUBTITLE_FORMATS = ('srt', 'vtt', 'json')
+def _vtt_timestamp_to_seconds(value: str) -> float:
+    parts = value.strip().replace(',', '.').split(':')
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+def parse_vtt_cues(text: str) -> List[dict]:
+    cues = []
+    for block in re.split(r'\n\s*\n', text.replace('\r', '')):
+        lines = [line for line in block.split('\n') if line.strip()]
+        timing_index = next((i for i, line in enumerate(lines) if '-->' in line), None)
+        if timing_index is None:
+            continue
+        start, _, end = lines[timing_index].partition('-->')
+        try:
+            start_seconds = _vtt_timestamp_to_seconds(start)
+            end_seconds = _vtt_timestamp_to_seconds(end.split()[0])
+        except (ValueError, IndexError):
+            continue
+        cue_text = ' '.join(re.sub(r'<[^>]+>', '', line).strip() for line in lines[timing_index + 1:]).strip()
+        if not cue_text:
+            continue
+        if cues and cues[-1]['text'] == cue_text:
+            cues[-1]['end'] = round(end_seconds, 3)
+            continue
+        cues.append({'start': round(start_seconds, 3), 'end': round(end_seconds, 3), 'text': cue_text})
+    return cues
+def convert_vtt_to_json(vtt_path: str) -> str:
+    with open(vtt_path, 'r', encoding='utf-8', errors='replace') as f:
+        cues = parse_vtt_cues(f.read())
+    json_path = f"{os.path.splitext(vtt_path)[0]}.json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(cues, f, ensure_ascii=False)
+    os.remove(vtt_path)
+    return json_path
+def find_subtitle_files(info: dict, media_path: Optional[str] = None) -> List[str]:
+    import glob
+    found = []
+    for sub in (info.get('requested_subtitles') or {}).values():
+        path = sub.get('filepath')
+        if path and os.path.exists(path):
+            found.append(path)
+    if not found and media_path:
+        stem = glob.escape(os.path.splitext(media_path)[0])
+        for ext in ('srt', 'vtt', 'json3', 'ass', 'lrc'):
+            found.extend(glob.glob(f"{stem}.*.{ext}"))
+    return found
+class ManifestFiles:
+    def __init__(self, path: str):
+        from array import array
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.offsets = array('Q')
+        if os.path.exists(self.index_path) and os.path.getmtime(self.index_path) >= os.path.getmtime(path):
+            with open(self.index_path, 'rb') as f:
+                self.offsets.frombytes(f.read())
+        else:
+            self.offsets = build_manifest_index(path)
+    def __len__(self) -> int:
+        return len(self.offsets)
+    def record(self, index: int) -> dict:
+        if index < 0:
+            index += len(self.offsets)
+        if not 0 <= index < len(self.offsets):
+            raise IndexError(index)
+        with open(self.path, 'rb') as f:
+            f.seek(self.offsets[index])
+            return json.loads(f.readline().decode('utf-8'))
+    def __getitem__(self, index: int) -> str:
+        return self.record(index)['file_path']
+    def __iter__(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('file_path'):
+                    yield record['file_path']
+def build_manifest_index(path: str):
+    from array import array
+    offsets = array('Q')
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            if b'"file_path"' in line and json.loads(line.decode('utf-8')).get('file_path'):
+                offsets.append(offset)
+            offset += len(line)
+    with open(f"{path}.idx", 'wb') as f:
+        f.write(offsets.tobytes())
+    return offsets
+def write_download_manifest(path: str, records: List[dict]) -> int:
+    from array import array
+    offsets = array('Q')
+    with open(path, 'wb') as f:
+        for record in records:
+            line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+            if record.get('file_path'):
+                offsets.append(f.tell())
+            f.write(line)
+    with open(f"{path}.idx", 'wb') as f:
+        f.write(offsets.tobytes())
+    return len(offsets)
+def is_manifest_reference(downloaded_files: str) -> bool:
+    if not downloaded_files:
+        return False
+    candidate = downloaded_files.strip()
+    return '\n' not in candidate and candidate.endswith('.jsonl') and os.path.isfile(candidate)
+def load_file_list(downloaded_files: str):
+    if is_manifest_reference(downloaded_files):
+        return ManifestFiles(downloaded_files.strip())
+    return split_file_list(downloaded_files)
+def listing_window(file_paths, current_index: int, limit: int = 50) -> range:
+    if isinstance(file_paths, list) or len(file_paths) <= limit:
+        return range(len(file_paths))
+    start = max(0, min(current_index - limit // 2, len(file_paths) - limit))
+    return range(start, start + limit)
+def probe_media_streams(file_path: str) -> dict:
+    try:
+        result = subprocess.run([
+            'ffprobe', '-v', 'error', '-show_entries',
+            'stream=codec_type,codec_name,sample_rate,channels,width,height:format=duration',
+            '-of', 'json', file_path
+        ], capture_output=True, check=True, text=True)
+        return json.loads(result.stdout or '{}')
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return {}
+def probe_audio_codec(file_path: str) -> Optional[dict]:
+    for stream in probe_media_streams(file_path).get('streams', []):
+        if stream.get('codec_type') == 'audio':
+            return stream
+    return None
+AUDIO_DTYPES = ('float32', 'float16', 'bfloat16')
+CHANNEL_LAYOUTS = {
+    1: ('FC',),
+    2: ('FL', 'FR'),
+    3: ('FL', 'FR', 'LFE'),
+    4: ('FL', 'FR', 'FC', 'BC'),
+    5: ('FL', 'FR', 'FC', 'BL', 'BR'),
+    6: ('FL', 'FR', 'FC', 'LFE', 'BL', 'BR'),
+    7: ('FL', 'FR', 'FC', 'LFE', 'BC', 'SL', 'SR'),
+    8: ('FL', 'FR', 'FC', 'LFE', 'BL', 'BR', 'SL', 'SR'),
+}
+CHANNEL_FALLBACKS = {
+    'FL': (('FC',),),
+    'FR': (('FC',),),
+    'FC': (('FL', 'FR'),),
+    'BL': (('SL',), ('FL',), ('FC',)),
+    'BR': (('SR',), ('FR',), ('FC',)),
+    'SL': (('BL',), ('FL',), ('FC',)),
+    'SR': (('BR',), ('FR',), ('FC',)),
+    'BC': (('BL', 'BR'), ('SL', 'SR'), ('FL', 'FR'), ('FC',)),
+    'LFE': (),
+}
+def channel_mix_matrix(source_channels: int, target_channels: int):
+    import math
+    import torch
+    source_layout = CHANNEL_LAYOUTS.get(source_channels)
+    target_layout = CHANNEL_LAYOUTS.get(target_channels)
+    if source_layout is None or target_layout is None:
+        return torch.full((target_channels, source_channels), 1.0 / source_channels)
+    mix = torch.zeros((target_channels, source_channels))
+    for j, name in enumerate(source_layout):
+        if name in target_layout:
+            mix[target_layout.index(name), j] = 1.0
+            continue
+        for targets in CHANNEL_FALLBACKS[name]:
+            if all(target in target_layout for target in targets):
+                for target in targets:
+                    mix[target_layout.index(target), j] += math.sqrt(0.5)
+                break
+    peak = mix.sum(dim=1).max()
+    if peak > 1.0:
+        mix /= peak
+    return mix
+def conform_waveform(waveform, sample_rate: int, target_sample_rate: int = 0, target_channels: int = 0,
+                     dtype: str = 'float32'):
+    import torch
+    channels = waveform.shape[-2]
+    mix = channel_mix_matrix(channels, target_channels) if target_channels and target_channels != channels else None
+    if mix is not None and target_channels < channels:
+        waveform = torch.matmul(mix.to(waveform.dtype), waveform)
+        mix = None
+    if target_sample_rate and target_sample_rate != sample_rate:
+        import torchaudio
+        waveform = torchaudio.functional.resample(waveform, sample_rate, target_sample_rate)
+        sample_rate = target_sample_rate
+    if mix is not None:
+        waveform = torch.matmul(mix.to(waveform.dtype), waveform)
+    return waveform.to(getattr(torch, dtype)), sample_rate
+def decode_audio_ffmpeg(file_path: str, sample_rate: int = 44100, channels: int = 2):
+    import numpy as np
+    import torch
+    result = subprocess.run([
+        'ffmpeg', '-v', 'error', '-i', file_path, '-vn', '-f', 'f32le', '-acodec', 'pcm_f32le',
+        '-ar', str(sample_rate), '-ac', str(channels), '-'
+    ], capture_output=True, check=True)
+    samples = np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, channels)
+    return torch.from_numpy(samples.T.copy()), sample_rate
+class AudioCache:
+    def __init__(self, max_bytes: int = 1024 * 1024 * 1024):
+        import threading
+        from collections import OrderedDict
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+    @staticmethod
+    def key(file_path: str, *target) -> tuple:
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size) + target
+    def get(self, key):
+        with self.lock:
+            audio = self.entries.get(key)
+            if audio is not None:
+                self.entries.move_to_end(key)
+            return audio
+    def put(self, key, audio: dict):
+        waveform = audio['waveform']
+        nbytes = waveform.numel() * waveform.element_size()
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = audio
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted['waveform'].numel() * evicted['waveform'].element_size()
+AUDIO_CACHE = AudioCache()
+def load_audio_waveform(file_path: str, target_sample_rate: int = 0, target_channels: int = 0,
+                        dtype: str = 'float32', use_cache: bool = True) -> dict:
+    key = AudioCache.key(file_path, target_sample_rate, target_channels, dtype) if use_cache else None
+    if key is not None:
+        cached = AUDIO_CACHE.get(key)
+        if cached is not None:
+            return cached
+    try:
+        import torchaudio
+        waveform, sample_rate = torchaudio.load(file_path)
+        waveform, sample_rate = conform_waveform(waveform, sample_rate, target_sample_rate, target_channels, dtype)
+    except Exception as e:
+        print(f"⚠️ Direct audio load failed: {e}")
+        waveform, sample_rate = decode_audio_ffmpeg(file_path, target_sample_rate or 44100, target_channels or 2)
+        waveform, sample_rate = conform_waveform(waveform, sample_rate, dtype=dtype)
+        print("✅ Audio decoded with ffmpeg")
+    audio = {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
+    if key is not None:
+        AUDIO_CACHE.put(key, audio)
+    return audio
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+def summarize_samples(values: List[float]) -> dict:
+    return {
+        'count': len(values),
+        'total': round(sum(values), 3),
+        'p50': round(percentile(values, 50), 3),
+        'p90': round(percentile(values, 90), 3),
+        'p99': round(percentile(values, 99), 3),
+        'max': round(max(values), 3) if values else 0.0,
+    }
+def parse_playlist_items(spec: str):
+    if not spec or not spec.strip():
+        return (lambda position: True), None
+    from yt_dlp.YoutubeDL import PlaylistEntries
+    try:
+        items = list(PlaylistEntries.parse_playlist_items(spec.replace(' ', '')))
+    except ValueError as e:
+        raise ValueError(f"Invalid playlist_items '{spec}': {e}")
+    ranges = []
+    for item in items:
+        if not isinstance(item, slice):
+            item = slice(item, item, None)
+        first = 1 if item.start is None else item.start
+        last = None if item.stop is None or item.stop == float('inf') else int(item.stop)
+        step = item.step or 1
+        if first < 1 or (last is not None and last < 1) or step < 1:
+            raise ValueError(f"Unsupported playlist_items '{spec}': indexes start at 1, and negative indexes or steps "
+                             f"would need the playlist length while playlists are paged lazily")
+        if last is None or last >= first:
+            ranges.append((first, last, step))
+    if not ranges:
+        return (lambda position: False), 0
+    last_index = None if any(last is None for _, last, _ in ranges) else max(last for _, last, _ in ranges)
+    def is_selected(position: int) -> bool:
+        return any(first <= position and (last is None or position <= last) and (position - first) % step == 0
+                   for first, last, step in ranges)
+    return is_selected, last_index
+def parse_date_after(date_str: str) -> Optional[str]:
+    if not date_str or not date_str.strip():
+        return None
+    try:
+        from yt_dlp.utils import date_from_str
+        return date_from_str(date_str.strip()).strftime('%Y%m%d')
+    except Exception:
+        print(f"⚠️ Invalid date_after value: {date_str} (use YYYYMMDD or now-7days)")
+        return None
+def entry_upload_date(entry: dict) -> Optional[str]:
+    if entry.get('upload_date'):
+        return str(entry['upload_date'])
+    timestamp = entry.get('timestamp') or entry.get('release_timestamp')
+    if timestamp:
+        import datetime
+        return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y%m%d')
+    return None
+class SyncState:
+    SAVE_EVERY = 25
+    MAX_ATTEMPTS = 3
+    def __init__(self, path: str):
+        self.path = path
+        self.sources = {}
+        self.dirty = False
+        self.unsaved = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.sources = json.load(f).get('sources', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read sync state {path}: {e} - starting a fresh sync")
+                self.sources = {}
+        self._id_sets = {}
+    def known_ids(self, source_key: str) -> set:
+        if source_key not in self._id_sets:
+            self._id_sets[source_key] = set(self.sources.get(source_key, {}).get('ids', []))
+        return self._id_sets[source_key]
+    def watermark_date(self, source_key: str) -> Optional[str]:
+        return self.sources.get(source_key, {}).get('last_upload_date')
+    def source(self, source_key: str, url: str) -> dict:
+        return self.sources.setdefault(source_key, {'url': url, 'ids': [], 'last_upload_date': None})
+    def pending_entries(self, source_key: str) -> List[dict]:
+        return [item for item in self.sources.get(source_key, {}).get('pending', {}).values()
+                if item.get('attempts', 0) < self.MAX_ATTEMPTS]
+    def mark_pending(self, source_key: str, url: str, entry: dict, status: str, error: Optional[str] = None):
+        if not entry.get('id'):
+            return
+        pending = self.source(source_key, url).setdefault('pending', {})
+        previous = pending.get(entry['id'], {})
+        item = {
+            'id': entry['id'],
+            'url': entry.get('webpage_url') or entry.get('url') or previous.get('url'),
+            'title': entry.get('title') or previous.get('title'),
+            'upload_date': entry_upload_date(entry) or previous.get('upload_date'),
+            'status': status,
+            'attempts': previous.get('attempts', 0),
+        }
+        if status == 'failed':
+            item['attempts'] += 1
+            item['error'] = error
+            if item['attempts'] == self.MAX_ATTEMPTS:
+                print(f"⚠️ Giving up on {item['title'] or item['url']} after {item['attempts']} failed syncs")
+        pending[entry['id']] = item
+        self.changed()
+    def defer(self, source_key: str, url: str, entry: dict):
+        self.mark_pending(source_key, url, entry, 'deferred')
+    def fail(self, source_key: str, url: str, entry: dict, error: Optional[str] = None):
+        self.mark_pending(source_key, url, entry, 'failed', error)
+    def record(self, source_key: str, url: str, entry_id: Optional[str], upload_date: Optional[str]):
+        import time
+        source = self.source(source_key, url)
+        source.get('pending', {}).pop(entry_id, None)
+        if entry_id and entry_id not in self.known_ids(source_key):
+            self.known_ids(source_key).add(entry_id)
+            source['ids'].append(entry_id)
+        if upload_date and (not source.get('last_upload_date') or upload_date > source['last_upload_date']):
+            source['last_upload_date'] = upload_date
+        source['last_sync'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.changed()
+    def changed(self):
+        self.dirty = True
+        self.unsaved += 1
+        if self.unsaved >= self.SAVE_EVERY:
+            self.save()
+    def save(self):
+        if not self.dirty:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'sources': self.sources}, f)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+        self.unsaved = 0
+def parse_size_limit(value: str, name: str) -> int:
+    if not value or not str(value).strip():
+        return 0
+    from yt_dlp.utils import parse_bytes
+    parsed = parse_bytes(str(value).strip())
+    if parsed is None:
+        print(f"⚠️ Invalid {name} '{value}' - ignoring")
+        return 0
+    return parsed
+def entry_size_estimate(entry: dict) -> Optional[int]:
+    total = 0
+    for fmt in entry.get('requested_formats') or [entry]:
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if not size:
+            return None
+        total += size
+    return total
+class TokenBucket:
+    def __init__(self):
+        import threading
+        self.lock = threading.Lock()
+        self.rate = 0.0
+        self.tokens = 0.0
+        self.updated = 0.0
+    def configure(self, rate: float):
+        import time
+        with self.lock:
+            if rate != self.rate:
+                self.rate = float(rate)
+                self.tokens = self.rate
+                self.updated = time.monotonic()
+    def consume(self, amount: int) -> float:
+        import time
+        with self.lock:
+            if self.rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+DOWNLOAD_RATE_BUCKET = TokenBucket()
+class DownloadQuota:
+    def __init__(self, folder: str, max_download_rate: int = 0, max_total_bytes: int = 0, min_free_disk: int = 0):
+        import threading
+        self.folder = folder
+        self.max_download_rate = max_download_rate
+        self.max_total_bytes = max_total_bytes
+        self.min_free_disk = min_free_disk
+        self.lock = threading.Lock()
+        self.used_bytes = 0
+        self.throttled_seconds = 0.0
+        self.file_bytes = {}
+        self.violation = None
+        self.partial_file = None
+        self.last_disk_check = 0.0
+        self.free_disk_cache = None
+        DOWNLOAD_RATE_BUCKET.configure(max_download_rate)
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_download_rate or self.max_total_bytes or self.min_free_disk)
+    def free_disk(self, max_age: float = 0.0) -> int:
+        import time
+        import shutil
+        now = time.monotonic()
+        if self.free_disk_cache is None or now - self.last_disk_check >= max_age:
+            self.free_disk_cache = shutil.disk_usage(self.folder).free
+            self.last_disk_check = now
+        return self.free_disk_cache
+    def allowance(self) -> Optional[int]:
+        limits = []
+        if self.max_total_bytes:
+            limits.append(self.max_total_bytes - self.used_bytes)
+        if self.min_free_disk:
+            limits.append(self.free_disk() - self.min_free_disk)
+        return min(limits) if limits else None
+    def check_entry(self, entry: dict) -> Optional[str]:
+        from yt_dlp.utils import format_bytes
+        if self.max_total_bytes and self.used_bytes >= self.max_total_bytes:
+            return f"byte budget of {format_bytes(self.max_total_bytes)} is used up"
+        if self.min_free_disk and self.free_disk() <= self.min_free_disk:
+            return f"free disk space is below {format_bytes(self.min_free_disk)}"
+        allowance = self.allowance()
+        estimate = entry_size_estimate(entry)
+        if allowance is not None and estimate and estimate > allowance:
+            return f"needs ~{format_bytes(estimate)} but only {format_bytes(max(allowance, 0))} is left"
+        return None
+    def on_progress(self, d: dict):
+        from yt_dlp.utils import DownloadCancelled, format_bytes
+        filename = d.get('tmpfilename') or d.get('filename')
+        downloaded = d.get('downloaded_bytes') or 0
+        with self.lock:
+            delta = max(0, downloaded - self.file_bytes.get(filename, 0))
+            self.file_bytes[filename] = max(downloaded, self.file_bytes.get(filename, 0))
+            self.used_bytes += delta
+        if delta and self.max_download_rate:
+            self.throttled_seconds += DOWNLOAD_RATE_BUCKET.consume(delta)
+        if d.get('status') != 'downloading' or not (self.max_total_bytes or self.min_free_disk):
+            return
+        remaining = max(0, (d.get('total_bytes') or d.get('total_bytes_estimate') or 0) - downloaded)
+        if self.max_total_bytes and self.used_bytes + remaining > self.max_total_bytes:
+            self.violation = (f"would exceed the byte budget of {format_bytes(self.max_total_bytes)} "
+                              f"({format_bytes(self.used_bytes + remaining)} needed)")
+        elif self.min_free_disk and self.free_disk(max_age=1.0) - remaining < self.min_free_disk:
+            self.violation = f"would leave less than {format_bytes(self.min_free_disk)} of free disk space"
+        if self.violation:
+            self.partial_file = d.get('tmpfilename')
+            raise DownloadCancelled(f"Quota reached: {self.violation}")
+    def take_violation(self) -> Optional[str]:
+        violation, self.violation = self.violation, None
+        partial_file, self.partial_file = self.partial_file, None
+        if partial_file and os.path.exists(partial_file):
+            try:
+                os.remove(partial_file)
+            except OSError:
+                pass
+        return violation
+    def to_dict(self) -> dict:
+        return {
+            'max_download_rate': self.max_download_rate,
+            'max_total_bytes': self.max_total_bytes,
+            'min_free_disk': self.min_free_disk,
+            'used_bytes': self.used_bytes,
+            'throttled_seconds': round(self.throttled_seconds, 3),
+        }
+class PathLock:
+    def __init__(self, target: str, timeout: float = 3600.0):
+        self.lock_path = f"{target}.lock"
+        self.timeout = timeout
+        self.fd = None
+    @staticmethod
+    def lock_fd(fd: int, unlock: bool = False) -> bool:
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK if unlock else msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_UN if unlock else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+    def acquire(self):
+        import time
+        started = time.monotonic()
+        announced = False
+        while True:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR)
+            if self.lock_fd(fd):
+                try:
+                    current = os.fstat(fd).st_ino == os.stat(self.lock_path).st_ino
+                except OSError:
+                    current = False
+                if current:
+                    os.ftruncate(fd, 0)
+                    os.write(fd, f"{os.getpid()}\n".encode())
+                    self.fd = fd
+                    return self
+            os.close(fd)
+            if time.monotonic() - started > self.timeout:
+                raise TimeoutError(f"Timed out waiting for {self.lock_path}")
+            if not announced:
+                print(f"🔒 Waiting for another download of {os.path.basename(self.lock_path[:-5])}")
+                announced = True
+            time.sleep(0.5)
+    def release(self):
+        if self.fd is None:
+            return
+        fd, self.fd = self.fd, None
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+        self.lock_fd(fd, unlock=True)
+        os.close(fd)
+    def __enter__(self):
+        return self.acquire()
+    def __exit__(self, *exc):
+        self.release()
+        return False
+class OutputNamer:
+    MODES = ('template', 'template_with_id', 'content_hash')
+    STAGING_DIR = '.ytdl_staging'
+    ID_INDEX = '.ytdl_ids.jsonl'
+    def __init__(self, output_folder: str, mode: str = 'template'):
+        import uuid
+        self.output_folder = output_folder
+        self.mode = mode if mode in self.MODES else 'template'
+        self.staging_dir = os.path.join(output_folder, self.STAGING_DIR, uuid.uuid4().hex)
+        self.index_path = os.path.join(output_folder, self.ID_INDEX)
+        self.embeds_id = False
+        self.ids = {}
+        self.ids_mtime = None
+        os.makedirs(self.staging_dir, exist_ok=True)
+    def apply_template(self, template: str) -> str:
+        if self.mode == 'template_with_id' and '%(id)' not in template:
+            base, ext = (template[:-len('.%(ext)s')], '.%(ext)s') if template.endswith('.%(ext)s') else (template, '')
+            template = f"{base} [%(id)s]{ext}"
+        self.embeds_id = '%(id)' in template
+        return os.path.join(self.staging_dir, template)
+    def target_stem(self, staged_path: str) -> str:
+        stem = os.path.splitext(staged_path)[0]
+        return os.path.join(self.output_folder, os.path.relpath(stem, self.staging_dir))
+    def lock(self, stem: str) -> PathLock:
+        return PathLock(stem)
+    @staticmethod
+    def video_key(entry: dict) -> Optional[str]:
+        if not entry.get('id'):
+            return None
+        return f"{entry.get('extractor_key') or entry.get('ie_key') or ''}:{entry['id']}"
+    def load_ids(self) -> dict:
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return self.ids
+        if mtime != self.ids_mtime:
+            ids = {}
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        ids[record['file']] = record['id']
+                    except (ValueError, KeyError, TypeError):
+                        continue
+            self.ids, self.ids_mtime = ids, mtime
+        return self.ids
+    def record_id(self, path: str, video_key: Optional[str]):
+        if not video_key:
+            return
+        relative = os.path.relpath(path, self.output_folder)
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'file': relative, 'id': video_key}, ensure_ascii=False) + '\n')
+        self.ids[relative] = video_key
+    def existing_output(self, stem: str, extensions: List[str], video_key: Optional[str] = None) -> Optional[str]:
+        if self.mode == 'content_hash' or not video_key:
+            return None
+        ids = {} if self.embeds_id else self.load_ids()
+        counter = 0
+        candidate = stem
+        while True:
+            present = [f"{candidate}.{ext}" for ext in extensions if os.path.exists(f"{candidate}.{ext}")]
+            if not present:
+                return None
+            for path in present:
+                if self.embeds_id or ids.get(os.path.relpath(path, self.output_folder)) == video_key:
+                    return path
+            counter += 1
+            candidate = f"{stem} ({counter})"
+    @staticmethod
+    def content_hash(path: str) -> str:
+        import hashlib
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    def commit(self, staged_file: str, stem: str, video_key: Optional[str] = None) -> Tuple[str, bool]:
+        staged_stem, ext = os.path.splitext(staged_file)
+        if self.mode == 'content_hash':
+            final_stem = f"{stem} [{self.content_hash(staged_file)[:12]}]"
+            if os.path.exists(f"{final_stem}{ext}"):
+                os.remove(staged_file)
+                self.move_sidecars(staged_stem, final_stem)
+                return f"{final_stem}{ext}", True
+        else:
+            final_stem = stem
+            counter = 1
+            while os.path.exists(f"{final_stem}{ext}"):
+                final_stem = f"{stem} ({counter})"
+                counter += 1
+        os.replace(staged_file, f"{final_stem}{ext}")
+        self.move_sidecars(staged_stem, final_stem)
+        if not self.embeds_id and self.mode != 'content_hash':
+            self.record_id(f"{final_stem}{ext}", video_key)
+        return f"{final_stem}{ext}", False
+    def move_sidecars(self, staged_stem: str, final_stem: str):
+        import glob
+        for path in glob.glob(f"{glob.escape(staged_stem)}.*"):
+            if path.endswith('.part') or path.endswith('.ytdl'):
+                continue
+            os.replace(path, f"{final_stem}{path[len(staged_stem):]}")
+    def cleanup(self):
+        import shutil
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        try:
+            os.rmdir(os.path.dirname(self.staging_dir))
+        except OSError:
+            pass
+SPONSORBLOCK_CATEGORIES = ('sponsor', 'intro', 'outro', 'selfpromo', 'preview', 'interaction',
+                           'music_offtopic', 'filler')
+SEGMENTS_FILE_CACHE = {}
+def load_segments_file(path: str) -> dict:
+    mtime = os.path.getmtime(path)
+    cached = SEGMENTS_FILE_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {item.get('videoID'): item.get('segments') for item in data if isinstance(item, dict)}
+    segments = {}
+    for video_id, items in data.items():
+        parsed = []
+        for item in items or []:
+            if not isinstance(item, dict) or item.get('actionType', 'skip') != 'skip':
+                continue
+            bounds = item.get('segment') or (item.get('start'), item.get('end'))
+            try:
+                start, end = float(bounds[0]), float(bounds[1])
+            except (TypeError, ValueError, IndexError):
+                continue
+            if end > start:
+                parsed.append({'start': start, 'end': end, 'category': str(item.get('category', 'sponsor')).lower()})
+        segments[str(video_id)] = parsed
+    SEGMENTS_FILE_CACHE[path] = (mtime, segments)
+    return segments
+def merge_ranges(ranges) -> List[Tuple[float, float]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+def plan_kept_ranges(entry: dict, categories: set, segments: dict, chapter_pattern=None,
+                     window: Tuple[float, Optional[float]] = (0.0, None), min_length: float = 1.0):
+    duration = entry.get('duration')
+    if not duration:
+        return None, []
+    window_start = max(0.0, float(window[0] or 0.0))
+    window_end = min(float(duration), float(window[1])) if window[1] else float(duration)
+    removed = []
+    if categories:
+        for segment in segments.get(str(entry.get('id')), []):
+            if 'all' in categories or segment['category'] in categories:
+                removed.append(dict(segment))
+    if chapter_pattern:
+        for chapter in entry.get('chapters') or []:
+            title = chapter.get('title') or ''
+            if chapter.get('end_time') is not None and chapter_pattern.search(title):
+                removed.append({'start': float(chapter.get('start_time') or 0), 'end': float(chapter['end_time']),
+                                'category': 'chapter', 'title': title})
+    removed = [dict(segment, start=max(segment['start'], window_start), end=min(segment['end'], window_end))
+               for segment in removed]
+    removed = [segment for segment in removed if segment['end'] > segment['start']]
+    if not removed:
+        return None, []
+    kept = []
+    position = window_start
+    for start, end in merge_ranges((segment['start'], segment['end']) for segment in removed):
+        if start - position >= min_length:
+            kept.append((position, start))
+        position = max(position, end)
+    if window_end - position >= min_length:
+        kept.append((position, window_end))
+    return kept, removed
+def section_template(template: str) -> str:
+    if template.endswith('.%(ext)s'):
+        return f"{template[:-len('.%(ext)s')]}.section%(section_number)03d.%(ext)s"
+    return f"{template}.section%(section_number)03d"
+def section_options(ydl_opts: dict) -> dict:
+    opts = {k: v for k, v in ydl_opts.items() if k not in ('external_downloader', 'external_downloader_args')}
+    template = ydl_opts['outtmpl']
+    if isinstance(template, dict):
+        template = template['default']
+    opts['outtmpl'] = section_template(template)
+    return opts
+def concat_media_sections(section_files: List[str], output_path: str) -> bool:
+    list_path = f"{output_path}.concat.txt"
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in section_files:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        result = subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+                                 '-map', '0', '-c', 'copy', output_path], capture_output=True, text=True)
+    finally:
+        os.remove(list_path)
+    if result.returncode != 0:
+        print(f"❌ Could not join sections: {result.stderr.strip()[-300:]}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return False
+    return True
+class MediaLibrary:
+    DB_DIR = '.ytdl_library'
+    DB_NAME = 'library.sqlite'
+    SORT_COLUMNS = ('mtime', 'size', 'duration', 'title', 'path')
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.db_path = os.path.join(self.root, self.DB_DIR, self.DB_NAME)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS media (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime REAL,
+                    media_type TEXT,
+                    duration REAL,
+                    audio_codec TEXT,
+                    video_codec TEXT,
+                    width INTEGER,
+                    height INTEGER,
+                    source_url TEXT,
+                    title TEXT,
+                    indexed_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime REAL);
+                CREATE INDEX IF NOT EXISTS media_mtime ON media (mtime);
+                CREATE INDEX IF NOT EXISTS media_title ON media (title);
+            ''')
+    def connect(self):
+        import sqlite3
+        from contextlib import closing, contextmanager
+        @contextmanager
+        def connection():
+            with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+                with conn:
+                    yield conn
+        return connection()
+    def _walk(self):
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                dir_mtime = os.stat(directory).st_mtime
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            yield ('dir', directory, dir_mtime, 0)
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if ext in AUDIO_EXTENSIONS or ext in VIDEO_EXTENSIONS:
+                        stat = entry.stat()
+                        yield ('file', entry.path, stat.st_mtime, stat.st_size)
+    def dirs_unchanged(self, conn) -> bool:
+        known = dict(conn.execute('SELECT path, mtime FROM dirs'))
+        if not known:
+            return False
+        for path, mtime in known.items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+    def probe(self, path: str) -> dict:
+        probe = probe_media_streams(path)
+        streams = probe.get('streams', [])
+        audio = next((st for st in streams if st.get('codec_type') == 'audio'), {})
+        video = next((st for st in streams if st.get('codec_type') == 'video'
+                      and st.get('codec_name') not in ('mjpeg', 'png', 'bmp')), {})
+        try:
+            duration = float(probe.get('format', {}).get('duration'))
+        except (TypeError, ValueError):
+            duration = None
+        ext = os.path.splitext(path)[1].lower()
+        if video:
+            media_type = 'video'
+        elif audio or ext in AUDIO_EXTENSIONS:
+            media_type = 'audio'
+        else:
+            media_type = 'video' if ext in VIDEO_EXTENSIONS else 'unknown'
+        return {
+            'media_type': media_type,
+            'duration': duration,
+            'audio_codec': audio.get('codec_name'),
+            'video_codec': video.get('codec_name'),
+            'width': video.get('width'),
+            'height': video.get('height'),
+        }
+    def refresh(self, full_rescan: bool = False, max_workers: int = 8) -> dict:
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        stats = {'scanned': 0, 'added': 0, 'updated': 0, 'removed': 0, 'skipped_scan': False}
+        with self.connect() as conn:
+            if not full_rescan and self.dirs_unchanged(conn):
+                stats['skipped_scan'] = True
+                return stats
+            known = {path: (size, mtime) for path, size, mtime in conn.execute('SELECT path, size, mtime FROM media')}
+        seen = set()
+        dirs = []
+        changed = []
+        for kind, path, mtime, size in self._walk():
+            if kind == 'dir':
+                dirs.append((path, mtime))
+                continue
+            stats['scanned'] += 1
+            seen.add(path)
+            previous = known.get(path)
+            if full_rescan or previous is None or previous != (size, mtime):
+                changed.append((path, size, mtime, previous is None))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            probes = list(executor.map(lambda item: self.probe(item[0]), changed))
+        removed = [path for path in known if path not in seen]
+        now = time.time()
+        with self.connect() as conn:
+            for (path, size, mtime, is_new), probe in zip(changed, probes):
+                self.store(conn, path, size, mtime, probe, now)
+                stats['added' if is_new else 'updated'] += 1
+            conn.executemany('DELETE FROM media WHERE path = ?', [(path,) for path in removed])
+            stats['removed'] = len(removed)
+            conn.execute('DELETE FROM dirs')
+            conn.executemany('INSERT INTO dirs (path, mtime) VALUES (?, ?)', dirs)
+        return stats
+    def store(self, conn, path: str, size: int, mtime: float, probe: dict, indexed_at: float):
+        conn.execute('''
+            INSERT INTO media (path, size, mtime, media_type, duration, audio_codec, video_codec,
+                               width, height, title, indexed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                size = excluded.size, mtime = excluded.mtime, media_type = excluded.media_type,
+                duration = excluded.duration, audio_codec = excluded.audio_codec,
+                video_codec = excluded.video_codec, width = excluded.width,
+                height = excluded.height, indexed_at = excluded.indexed_at,
+                title = COALESCE(media.title, excluded.title)
+        ''', (path, size, mtime, probe['media_type'], probe['duration'], probe['audio_codec'],
+              probe['video_codec'], probe['width'], probe['height'],
+              os.path.splitext(os.path.basename(path))[0], indexed_at))
+    def record_download(self, path: str, source_url: Optional[str], title: Optional[str]):
+        import time
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        probe = self.probe(path)
+        with self.connect() as conn:
+            self.store(conn, path, stat.st_size, stat.st_mtime, probe, time.time())
+            conn.execute('UPDATE media SET source_url = ?, title = ? WHERE path = ?', (source_url, title, path))
+    def revalidate(self, rows: List[dict]) -> List[dict]:
+        import time
+        current = []
+        with self.connect() as conn:
+            for row in rows:
+                try:
+                    stat = os.stat(row['path'])
+                except OSError:
+                    conn.execute('DELETE FROM media WHERE path = ?', (row['path'],))
+                    continue
+                if (stat.st_size, stat.st_mtime) != (row['size'], row['mtime']):
+                    probe = self.probe(row['path'])
+                    self.store(conn, row['path'], stat.st_size, stat.st_mtime, probe, time.time())
+                    row = dict(row, size=stat.st_size, mtime=stat.st_mtime, **probe)
+                current.append(row)
+        return current
+    def query(self, media_type: str = "all", search: str = "", min_duration: float = 0.0,
+              max_duration: float = 0.0, sort_by: str = "mtime", descending: bool = True,
+              limit: int = 0) -> List[dict]:
+        clauses = ['size IS NOT NULL']
+        params = []
+        if media_type != "all":
+            clauses.append('media_type = ?')
+            params.append(media_type)
+        if search and search.strip():
+            clauses.append('(title LIKE ? OR path LIKE ? OR source_url LIKE ?)')
+            params.extend([f"%{search.strip()}%"] * 3)
+        if min_duration > 0:
+            clauses.append('duration >= ?')
+            params.append(min_duration)
+        if max_duration > 0:
+            clauses.append('duration <= ?')
+            params.append(max_duration)
+        column = sort_by if sort_by in self.SORT_COLUMNS else 'mtime'
+        sql = (f"SELECT * FROM media WHERE {' AND '.join(clauses)} "
+               f"ORDER BY {column} {'DESC' if descending else 'ASC'}")
+        if limit > 0:
+            sql += f" LIMIT {int(limit)}"
+        with self.connect() as conn:
+            import sqlite3
+            conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        return self.revalidate(rows)
+class DownloadMetrics:
+    STAGES = ('extract', 'download', 'postprocess', 'file_resolve', 'sleep')
+    MAX_EVENTS = 2000
+    def __init__(self, total_steps: int, progress_interval: float = 0.5):
+        import time
+        from collections import deque
+        self.total_steps = max(total_steps, 1)
+        self.progress_interval = max(progress_interval, 0.0)
+        self.started = time.time()
+        self.stage_seconds = {stage: 0.0 for stage in self.STAGES}
+        self.stage_cpu_seconds = {stage: 0.0 for stage in self.STAGES}
+        self.stage_counts = {stage: 0 for stage in self.STAGES}
+        self.stage_samples = {stage: [] for stage in self.STAGES}
+        self.video_samples = []
+        self.files = {}
+        self.events = deque(maxlen=self.MAX_EVENTS)
+        self.status_counts = {'success': 0, 'failed': 0}
+        self._last_emit = {}
+        self._last_step = -1
+        self.progress_bar = None
+        try:
+            import comfy.utils
+            self.progress_bar = comfy.utils.ProgressBar(self.total_steps)
+        except Exception:
+            self.progress_bar = None
+    def _throttled(self, key: str, force: bool = False) -> bool:
+        import time
+        now = time.time()
+        if not force and now - self._last_emit.get(key, 0.0) < self.progress_interval:
+            return False
+        self._last_emit[key] = now
+        return True
+    def update_progress(self, current_step: float, status_message: str, force: bool = False):
+        step = min(int(current_step), self.total_steps)
+        if self.progress_bar is not None and step != self._last_step:
+            self.progress_bar.update_absolute(step, self.total_steps)
+        step_changed = step != self._last_step
+        self._last_step = step
+        if force or step_changed or self._throttled('__status__'):
+            percent = (step / self.total_steps) * 100
+            print(f"📊 [{percent:5.1f}%] {status_message}")
+    def add_stage_time(self, stage: str, seconds: float, cpu_seconds: float = 0.0,
+                       timings: Optional[dict] = None):
+        seconds = max(seconds, 0.0)
+        cpu_seconds = max(cpu_seconds, 0.0)
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        self.stage_cpu_seconds[stage] = self.stage_cpu_seconds.get(stage, 0.0) + cpu_seconds
+        self.stage_counts[stage] = self.stage_counts.get(stage, 0) + 1
+        self.stage_samples.setdefault(stage, []).append(seconds)
+        if timings is not None:
+            slot = timings.setdefault(stage, {'wall': 0.0, 'cpu': 0.0})
+            slot['wall'] = round(slot['wall'] + seconds, 4)
+            slot['cpu'] = round(slot['cpu'] + cpu_seconds, 4)
+    def stage(self, stage: str, timings: Optional[dict] = None):
+        import time
+        from contextlib import contextmanager
+        @contextmanager
+        def timer():
+            started = time.perf_counter()
+            cpu_started = time.process_time()
+            try:
+                yield
+            finally:
+                self.add_stage_time(stage, time.perf_counter() - started,
+                                    time.process_time() - cpu_started, timings)
+        return timer()
+    def record_video_timing(self, timings: dict):
+        self.video_samples.append(sum(slot['wall'] for slot in timings.values()))
+    def record_file_progress(self, d: dict) -> bool:
+        import time
+        filename = d.get('filename') or 'Unknown'
+        total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+        downloaded = d.get('downloaded_bytes') or 0
+        entry = self.files.setdefault(filename, {
+            'filename': os.path.basename(filename),
+            'started': time.time(),
+            'downloaded_bytes': 0,
+            'total_bytes': 0,
+        })
+        entry['downloaded_bytes'] = downloaded
+        entry['total_bytes'] = total
+        entry['speed'] = d.get('speed')
+        done = d.get('status') != 'downloading' or (total and downloaded >= total)
+        if not self._throttled(filename, force=bool(done)):
+            return False
+        self.events.append({
+            'time': round(time.time() - self.started, 3),
+            'file': entry['filename'],
+            'status': d.get('status'),
+            'downloaded_bytes': downloaded,
+            'total_bytes': total,
+            'speed': d.get('speed'),
+            'eta': d.get('eta'),
+        })
+        return True
+    def finish_file(self, d: dict):
+        import time
+        filename = d.get('filename') or 'Unknown'
+        entry = self.files.get(filename)
+        if entry is None:
+            return
+        final_bytes = d.get('total_bytes') or d.get('downloaded_bytes') or entry['downloaded_bytes']
+        self.record_file_progress(dict(d, status='finished', downloaded_bytes=final_bytes, total_bytes=final_bytes))
+        entry['elapsed_seconds'] = round(time.time() - entry['started'], 3)
+        if entry['elapsed_seconds'] > 0:
+            entry['avg_speed'] = round(final_bytes / entry['elapsed_seconds'], 1)
+    def record_result(self, status: str):
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+    def to_dict(self) -> dict:
+        import time
+        files = [{k: v for k, v in entry.items() if k != 'started'} for entry in self.files.values()]
+        return {
+            'wall_seconds': round(time.time() - self.started, 3),
+            'stages': {
+                stage: {
+                    'seconds': round(seconds, 3),
+                    'cpu_seconds': round(self.stage_cpu_seconds.get(stage, 0.0), 3),
+                    'count': self.stage_counts.get(stage, 0),
+                }
+                for stage, seconds in self.stage_seconds.items()
+            },
+            'bytes_downloaded': sum(f['downloaded_bytes'] for f in files),
+            'files': files,
+            'events': list(self.events),
+        }
+    def timing_summary(self) -> dict:
+        return {
+            'stages': {
+                stage: summarize_samples(samples)
+                for stage, samples in self.stage_samples.items() if samples
+            },
+            'per_video': summarize_samples(self.video_samples),
+        }
+    def write_prometheus(self, path: str):
+        lines = [
+            '# HELP ytdl_stage_seconds_total Wall-clock seconds spent per download stage.',
+            '# TYPE ytdl_stage_seconds_total counter',
+        ]
+        for stage, seconds in self.stage_seconds.items():
+            lines.append(f'ytdl_stage_seconds_total{{stage="{stage}"}} {seconds:.6f}')
+        lines += [
+            '# HELP ytdl_stage_cpu_seconds_total CPU seconds spent in this process per download stage.',
+            '# TYPE ytdl_stage_cpu_seconds_total counter',
+        ]
+        for stage, seconds in self.stage_cpu_seconds.items():
+            lines.append(f'ytdl_stage_cpu_seconds_total{{stage="{stage}"}} {seconds:.6f}')
+        lines += [
+            '# HELP ytdl_stage_runs_total Number of times each stage ran.',
+            '# TYPE ytdl_stage_runs_total counter',
+        ]
+        for stage, count in self.stage_counts.items():
+            lines.append(f'ytdl_stage_runs_total{{stage="{stage}"}} {count}')
+        lines += [
+            '# HELP ytdl_downloads_total Finished downloads by status.',
+            '# TYPE ytdl_downloads_total counter',
+        ]
+        for status, count in self.status_counts.items():
+            lines.append(f'ytdl_downloads_total{{status="{status}"}} {count}')
+        metrics = self.to_dict()
+        lines += [
+            '# HELP ytdl_bytes_downloaded_total Bytes received from the network.',
+            '# TYPE ytdl_bytes_downloaded_total counter',
+            f'ytdl_bytes_downloaded_total {metrics["bytes_downloaded"]}',
+            '# HELP ytdl_run_seconds Wall-clock duration of the last run.',
+            '# TYPE ytdl_run_seconds gauge',
+            f'ytdl_run_seconds {metrics["wall_seconds"]}',
+        ]
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+class ExtractionPool:
+    def __init__(self, ydl_opts: dict, workers: int):
+        import pickle
+        import queue
+        import threading
+        worker_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ytdl_extract_worker.py')
+        self.workers = workers
+        self.broken = False
+        self.keep_subtitles = False
+        self.jobs = queue.Queue()
+        self.processes = [subprocess.Popen([sys.executable, worker_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                          for _ in range(workers)]
+        try:
+            for process in self.processes:
+                pickle.dump(ydl_opts, process.stdin)
+                process.stdin.flush()
+            for process in self.processes:
+                pickle.load(process.stdout)
+        except Exception:
+            self.shutdown()
+            raise
+        for process in self.processes:
+            threading.Thread(target=self.serve, args=(process,), daemon=True).start()
+    def serve(self, process):
+        import pickle
+        from concurrent.futures.process import BrokenProcessPool
+        error = None
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            future, request = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            if error is None:
+                try:
+                    pickle.dump(request, process.stdin)
+                    process.stdin.flush()
+                    future.set_result(pickle.load(process.stdout))
+                    continue
+                except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+                    self.broken = True
+                    error = f"worker {process.pid} exited ({e or process.poll()})"
+            future.set_exception(BrokenProcessPool(error))
+    def submit_extract(self, url: str):
+        from concurrent.futures import Future
+        future = Future()
+        self.jobs.put((future, (url, self.keep_subtitles)))
+        return future
+    def result(self, future, metrics=None, timings=None):
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            info, error, wall, cpu = future.result()
+        except BrokenProcessPool as e:
+            self.broken = True
+            return None, f"Extraction worker crashed: {e}"
+        except Exception as e:
+            return None, str(e)
+        if metrics is not None:
+            metrics.add_stage_time('extract', wall, cpu, timings)
+        if info:
+            info['__ytdl_pool_resolved'] = True
+        return info, error
+    def shutdown(self):
+        import queue
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job[0].cancel()
+        for process in self.processes:
+            self.jobs.put(None)
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+EXTRACTION_POOL = {'key': None, 'pool': None}
+DOWNLOAD_ONLY_OPTIONS = ('outtmpl', 'paths', 'postprocessors', 'progress_hooks', 'postprocessor_hooks',
+                         'external_downloader', 'external_downloader_args', 'ratelimit', 'download_ranges')
+def extraction_options(ydl_opts: dict) -> dict:
+    return {k: v for k, v in ydl_opts.items() if k not in DOWNLOAD_ONLY_OPTIONS}
+def get_extraction_pool(ydl_opts: dict, workers: int) -> ExtractionPool:
+    ydl_opts = extraction_options(ydl_opts)
+    key = (json.dumps(ydl_opts, sort_keys=True, default=str), workers)
+    pool = EXTRACTION_POOL['pool']
+    if pool is None or pool.broken or EXTRACTION_POOL['key'] != key:
+        if pool is not None:
+            pool.shutdown()
+        print(f"🧵 Starting {workers} extraction worker process(es)")
+        pool = ExtractionPool(ydl_opts, workers)
+        EXTRACTION_POOL.update(key=key, pool=pool)
+    return pool
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+THROTTLE_ERRORS = ('429', 'too many requests', 'rate limit')
+def is_throttle_error(message: str) -> bool:
+    message = message.lower()
+    return any(err in message for err in THROTTLE_ERRORS)
+class IdentityPool:
+    BASE_COOLDOWN = 30.0
+    MAX_COOLDOWN = 600.0
+    def __init__(self, source_addresses: List[str], proxies: List[str], user_agents: List[str],
+                 cooldown: float = BASE_COOLDOWN):
+        import threading
+        self.lock = threading.Lock()
+        self.cooldown = cooldown
+        self.identities = []
+        for index in range(max(len(source_addresses), len(proxies), len(user_agents), 1)):
+            self.identities.append({
+                'index': index,
+                'source_address': source_addresses[index % len(source_addresses)] if source_addresses else None,
+                'proxy': proxies[index % len(proxies)] if proxies else None,
+                'user_agent': user_agents[index % len(user_agents)] if user_agents else DEFAULT_USER_AGENT,
+                'assigned': 0,
+                'throttled': 0,
+                'in_flight': 0,
+                'streak': 0,
+                'cooldown_until': 0.0,
+            })
+    @staticmethod
+    def label(identity: dict) -> str:
+        proxy = identity['proxy'] and re.sub(r'^([A-Za-z][A-Za-z0-9+.-]*://)?[^@/]*@', r'\1', identity['proxy'])
+        parts = [part for part in (proxy, identity['source_address']) if part]
+        return ' via '.join(parts) if parts else f"identity #{identity['index'] + 1}"
+    @staticmethod
+    def throttle_rate(identity: dict) -> float:
+        return identity['throttled'] / identity['assigned'] if identity['assigned'] else 0.0
+    def options(self, ydl_opts: dict, identity: dict) -> dict:
+        opts = dict(ydl_opts)
+        opts['http_headers'] = dict(ydl_opts.get('http_headers') or {}, **{'User-Agent': identity['user_agent']})
+        if identity['source_address']:
+            opts['source_address'] = identity['source_address']
+        if identity['proxy']:
+            opts['proxy'] = identity['proxy']
+        return opts
+    def acquire(self, exclude: Optional[dict] = None) -> dict:
+        import time
+        with self.lock:
+            now = time.monotonic()
+            candidates = [identity for identity in self.identities if identity is not exclude] or self.identities
+            ready = [identity for identity in candidates if identity['cooldown_until'] <= now]
+            if ready:
+                chosen = min(ready, key=lambda i: (i['in_flight'], self.throttle_rate(i), i['assigned']))
+            else:
+                chosen = min(candidates, key=lambda i: i['cooldown_until'])
+            chosen['in_flight'] += 1
+            chosen['assigned'] += 1
+            return chosen
+    def release(self, identity: dict, throttled: Optional[bool] = None):
+        import time
+        with self.lock:
+            identity['in_flight'] = max(0, identity['in_flight'] - 1)
+            if throttled:
+                identity['throttled'] += 1
+                identity['streak'] += 1
+                backoff = min(self.MAX_COOLDOWN, self.cooldown * 2 ** (identity['streak'] - 1))
+                identity['cooldown_until'] = time.monotonic() + backoff
+            elif throttled is False:
+                identity['streak'] = 0
+    def cooldown_remaining(self, identity: dict) -> float:
+        import time
+        with self.lock:
+            return max(0.0, identity['cooldown_until'] - time.monotonic())
+    def to_dict(self) -> List[dict]:
+        import time
+        now = time.monotonic()
+        with self.lock:
+            return [{
+                'identity': self.label(identity),
+                'user_agent': identity['user_agent'],
+                'assigned': identity['assigned'],
+                'throttled': identity['throttled'],
+                'throttle_rate': round(self.throttle_rate(identity), 4),
+                'cooling_down_seconds': round(max(0.0, identity['cooldown_until'] - now), 1),
+            } for identity in self.identities]
+IDENTITY_POOLS = {}
+def split_identity_list(value: str, allow_commas: bool = True) -> List[str]:
+    separators = r'[\n,]' if allow_commas else r'\n'
+    return [part.strip() for part in re.split(separators, value or '') if part.strip()]
+def get_identity_pool(source_addresses: str, proxies: str, user_agents: str) -> Optional[IdentityPool]:
+    addresses = split_identity_list(source_addresses)
+    proxy_list = split_identity_list(proxies)
+    agents = split_identity_list(user_agents, allow_commas=False)
+    if not (addresses or proxy_list or agents):
+        return None
+    key = (tuple(addresses), tuple(proxy_list), tuple(agents))
+    if key not in IDENTITY_POOLS:
+        IDENTITY_POOLS[key] = IdentityPool(addresses, proxy_list, agents)
+    return IDENTITY_POOLS[key]
+class RunProfiler:
+    TOP_FUNCTIONS = 25
+    def __init__(self, mode: str, output_dir: str):
+        self.mode = mode
+        self.output_dir = output_dir
+        self.profiler = None
+    def start(self):
+        if self.mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self.profiler = Profiler()
+                self.profiler.start()
+                return
+            except ImportError:
+                print("⚠️ pyinstrument not installed (pip install pyinstrument), falling back to cProfile")
+                self.mode = "cprofile"
+        if self.mode == "cprofile":
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+    def stop(self) -> Optional[dict]:
+        if self.profiler is None:
+            return None
+        import time
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        if self.mode == "pyinstrument":
+            self.profiler.stop()
+            report_path = os.path.join(self.output_dir, f"ytdl_profile_{stamp}.html")
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(self.profiler.output_html())
+            print(f"🔬 Profile saved to: {report_path}")
+            return {'type': 'pyinstrument', 'path': report_path}
+        import pstats
+        self.profiler.disable()
+        report_path = os.path.join(self.output_dir, f"ytdl_profile_{stamp}.prof")
+        self.profiler.dump_stats(report_path)
+        stats = pstats.Stats(self.profiler)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        top = [{
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'calls': call_count,
+            'tottime': round(total_time, 4),
+            'cumtime': round(cumulative_time, 4),
+        } for (filename, line, name), (_, call_count, total_time, cumulative_time, _) in rows[:self.TOP_FUNCTIONS]]
+        print(f"🔬 Profile saved to: {report_path}")
+        return {'type': 'cprofile', 'path': report_path, 'top_cumulative': top}
+YOUTUBE_HOSTS = ('youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com',
+                 'youtube-nocookie.com', 'www.youtube-nocookie.com', 'youtu.be')
+YOUTUBE_ID_PATTERN = re.compile(r'^[0-9A-Za-z_-]{11}$')
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                   'si', 'feature', 'fbclid', 'gclid', 'pp')
+_extractor_host_cache = {}
+EXTRACTOR_MISS_CACHE_SIZE = 4096
+def _youtube_video_id(parsed) -> Optional[str]:
+    from urllib.parse import parse_qs
+    host = parsed.netloc.lower().split(':')[0]
+    if host not in YOUTUBE_HOSTS:
+        return None
+    path_parts = [part for part in parsed.path.split('/') if part]
+    candidate = None
+    if host == 'youtu.be':
+        candidate = path_parts[0] if path_parts else None
+    elif path_parts[:1] == ['watch']:
+        candidate = parse_qs(parsed.query).get('v', [None])[0]
+    elif len(path_parts) >= 2 and path_parts[0] in ('shorts', 'embed', 'live', 'v', 'e'):
+        candidate = path_parts[1]
+    if candidate and YOUTUBE_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+def _match_extractor(url: str, host: str):
+    try:
+        from yt_dlp.extractor import gen_extractor_classes
+    except ImportError:
+        return None
+    cached = _extractor_host_cache.setdefault(host, {'hits': [], 'misses': set()})
+    for ie in cached['hits']:
+        if ie.suitable(url):
+            return ie
+    if url in cached['misses']:
+        return None
+    for ie in gen_extractor_classes():
+        if ie.ie_key() != 'Generic' and ie.suitable(url):
+            cached['hits'].append(ie)
+            return ie
+    if len(cached['misses']) >= EXTRACTOR_MISS_CACHE_SIZE:
+        cached['misses'].clear()
+    cached['misses'].add(url)
+    return None
+def is_listing_url(url: str) -> bool:
+    from urllib.parse import urlparse
+    ie = _match_extractor(url, (urlparse(url).hostname or '').lower())
+    return ie is not None and ie._RETURN_TYPE in ('playlist', 'any')
+def normalize_media_url(url: str) -> Tuple[str, str]:
+    from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+    url = url.strip()
+    if url.startswith('www.'):
+        url = f"https://{url}"
+    parsed = urlsplit(url)
+    host = parsed.netloc.lower()
+    video_id = _youtube_video_id(parsed)
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}", f"youtube:{video_id}"
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS]
+    cleaned = urlunsplit((parsed.scheme.lower() or 'https', host, parsed.path or '/',
+                          urlencode(sorted(query)), ''))
+    extractor = _match_extractor(cleaned, host.split(':')[0])
+    if extractor is not None:
+        try:
+            temp_id = extractor.get_temp_id(cleaned)
+        except Exception:
+            temp_id = None
+        if temp_id:
+            key = f"{extractor.ie_key().lower()}:{temp_id}"
+            if extractor._RETURN_TYPE in ('playlist', 'any') and temp_id in parsed.path:
+                tab = parsed.path.split(temp_id, 1)[1].strip('/')
+                if tab:
+                    key = f"{key}/{tab}"
+            return cleaned, key
+    return cleaned, f"url:{cleaned}"
+def iter_links_from_file(file_path: str, file_format: str = "auto", url_field: str = "url"):
+    import csv
+    if file_format == "auto":
+        ext = os.path.splitext(file_path)[1].lower()
+        file_format = {'.csv': 'csv', '.tsv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(ext, 'txt')
+    with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        if file_format == 'csv':
+            dialect = 'excel-tab' if file_path.lower().endswith('.tsv') else 'excel'
+            reader = csv.reader(f, dialect=dialect)
+            header = next(reader, None)
+            column = None
+            if header:
+                lowered = [h.strip().lower() for h in header]
+                if url_field.lower() in lowered:
+                    column = lowered.index(url_field.lower())
+                elif header[0].strip().startswith(('http://', 'https://', 'www.')):
+                    yield header[0].strip()
+            for row in reader:
+                if not row:
+                    continue
+                if column is not None:
+                    if column < len(row):
+                        yield row[column].strip()
+                else:
+                    for cell in row:
+                        if cell.strip().startswith(('http://', 'https://', 'www.')):
+                            yield cell.strip()
+                            break
+        elif file_format == 'jsonl':
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, str):
+                    yield record
+                elif isinstance(record, dict):
+                    value = record.get(url_field) or record.get('webpage_url') or record.get('url')
+                    if isinstance(value, str):
+                        yield value
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+def order_links_by_host(links: List[str], ordering: str) -> List[str]:
+    from urllib.parse import urlsplit
+    if ordering == "input":
+        return links
+    groups = {}
+    for link in links:
+        groups.setdefault(urlsplit(link).netloc.lower(), []).append(link)
+    if ordering == "group_by_host":
+        return [link for group in groups.values() for link in group]
+    ordered = []
+    queues = [iter(group) for group in groups.values()]
+    while queues:
+        remaining = []
+        for queue in queues:
+            link = next(queue, None)
+            if link is not None:
+                ordered.append(link)
+                remaining.append(queue)
+        queues = remaining
+    return ordered
 class YTDLLinksInput:
     @classmethod
     def INPUT_TYPES(cls):
@@ -78,6 +1609,86 @@ class YTDLLinksInput:
             if link.startswith(('http://', 'https://', 'www.')):
                 valid_links.append(link)
         return (valid_links,)
+class YTDLLinksFromFile:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "file_paths": ("STRING", {
+                    "multiline": True,
+                    "default": "",
+                    "placeholder": "One .txt, .csv or .jsonl manifest path per line"
+                }),
+                "file_format": (["auto", "txt", "csv", "jsonl"], {"default": "auto"}),
+                "url_field": ("STRING", {
+                    "default": "url",
+                    "tooltip": "📑 CSV column header or JSONL key holding the URL"
+                }),
+                "normalize_urls": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "🧹 Rewrite youtu.be/shorts/embed links, drop timestamps, tracking and &list= params, and key entries by extractor ID"
+                }),
+                "deduplicate": ("BOOLEAN", {"default": True}),
+                "ordering": (["input", "group_by_host", "round_robin_hosts"], {
+                    "default": "input",
+                    "tooltip": "🔀 'group_by_host' batches links per site, 'round_robin_hosts' interleaves sites to spread load"
+                }),
+                "max_links": ("INT", {"default": 0, "min": 0, "max": 1000000, "step": 1,
+                                      "tooltip": "0 = no limit"}),
+            },
+            "optional": {
+                "links": ("YTDL_LINKS",),
+            }
+        }
+    RETURN_TYPES = ("YTDL_LINKS", "STRING")
+    RETURN_NAMES = ("links", "ingest_info")
+    FUNCTION = "load_links"
+    CATEGORY = "audio/ytdl"
+    def load_links(self, file_paths: str, file_format: str, url_field: str, normalize_urls: bool,
+                   deduplicate: bool, ordering: str, max_links: int, links: Optional[List[str]] = None):
+        def sources():
+            for link in links or []:
+                yield link
+            for file_path in split_file_list(file_paths):
+                if not os.path.isabs(file_path):
+                    file_path = os.path.join(os.getcwd(), file_path)
+                if not os.path.exists(file_path):
+                    print(f"⚠️ Link file not found: {file_path}")
+                    continue
+                print(f"📄 Reading links from: {file_path}")
+                yield from iter_links_from_file(file_path, file_format, url_field)
+        seen = set()
+        collected = []
+        stats = {'read': 0, 'invalid': 0, 'duplicates': 0}
+        for raw in sources():
+            stats['read'] += 1
+            raw = raw.strip()
+            if not raw.startswith(('http://', 'https://', 'www.')):
+                stats['invalid'] += 1
+                continue
+            if normalize_urls:
+                url, key = normalize_media_url(raw)
+            else:
+                url, key = raw, raw
+            if deduplicate:
+                if key in seen:
+                    stats['duplicates'] += 1
+                    continue
+                seen.add(key)
+            collected.append(url)
+            if max_links and len(collected) >= max_links:
+                print(f"✂️ Reached max_links ({max_links}), ignoring the rest of the input")
+                break
+        ordered = order_links_by_host(collected, ordering)
+        from urllib.parse import urlsplit
+        hosts = {}
+        for url in ordered:
+            host = urlsplit(url).netloc.lower()
+            hosts[host] = hosts.get(host, 0) + 1
+        print(f"🔗 Loaded {len(ordered)} link(s) from {stats['read']} input line(s) "
+              f"({stats['duplicates']} duplicate(s), {stats['invalid']} invalid)")
+        info = {'links': len(ordered), **stats, 'hosts': hosts, 'ordering': ordering}
+        return (ordered, json.dumps(info, indent=2))
 class YTDLDownloader:
     @classmethod
     def INPUT_TYPES(cls):
@@ -113,6 +1724,104 @@ class YTDLDownloader:
                 "continue_on_error": ("BOOLEAN", {"default": True}),
             },
             "optional": {
+                "playlist_items": ("STRING", {
+                    "default": "",
+                    "placeholder": "e.g. 1-20, 1,3,5-7 or 1:50:2 (empty = all)"
+                }),
+                "max_entries": ("INT", {
+                    "default": 0, "min": 0, "max": 100000, "step": 1,
+                    "tooltip": "📋 Stop paginating once this many playlist entries are selected (0 = no limit)"
+                }),
+                "date_after": ("STRING", {
+                    "default": "",
+                    "placeholder": "YYYYMMDD or now-7days (empty = any date)"
+                }),
+                "stop_at_older_entries": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "📅 Stop paginating at the first entry older than date_after (channels list newest first)"
+                }),
+                "sync_mode": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "🔁 Remember downloaded IDs and the newest upload date per source; later runs stop paginating at known entries and only fetch new ones"
+                }),
+                "sync_state_file": ("STRING", {
+                    "default": "",
+                    "placeholder": "Sync state JSON (default: <output_folder>/.ytdl_sync_state.json)"
+                }),
+                "download_subtitles": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "💬 Write uploaded subtitles next to the media"
+                }),
+                "auto_subtitles": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "🤖 Also write automatic (ASR) captions when no uploaded subtitles exist"
+                }),
+                "subtitle_languages": ("STRING", {
+                    "default": "en.*,en",
+                    "placeholder": "Comma-separated languages / regexes, e.g. en.*,de or all"
+                }),
+                "subtitle_format": (list(SUBTITLE_FORMATS), {
+                    "default": "srt",
+                    "tooltip": "💬 srt needs ffmpeg; json is a list of {start, end, text} cues"
+                }),
+                "skip_media": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "⚡ Fetch only subtitles/captions (no audio/video streams), resolving playlist entries concurrently"
+                }),
+                "subtitle_workers": ("INT", {"default": 8, "min": 1, "max": 64, "step": 1}),
+                "naming_mode": (list(OutputNamer.MODES), {
+                    "default": "template",
+                    "tooltip": "📝 template: custom_filename as is. template_with_id: appends [video id] so equal titles never collide. content_hash: appends a hash of the file content (identical files are stored once)"
+                }),
+                "extraction_workers": ("INT", {
+                    "default": 0, "min": 0, "max": 32, "step": 1,
+                    "tooltip": "🧵 Resolve videos in this many separate worker processes, keeping signature deciphering and JSON parsing off the ComfyUI process (0 = in-process)"
+                }),
+                "max_download_rate": ("STRING", {
+                    "default": "",
+                    "placeholder": "Bytes/s shared by all downloads, e.g. 5M (empty = unlimited)"
+                }),
+                "max_total_bytes": ("STRING", {
+                    "default": "",
+                    "placeholder": "Byte budget for this run, e.g. 20G (empty = unlimited)"
+                }),
+                "min_free_disk": ("STRING", {
+                    "default": "",
+                    "placeholder": "Keep at least this much free disk, e.g. 10G (empty = no check)"
+                }),
+                "skip_segments": ("STRING", {
+                    "default": "",
+                    "placeholder": "SponsorBlock categories to cut, e.g. sponsor,intro,outro,selfpromo (or all)"
+                }),
+                "segments_file": ("STRING", {
+                    "default": "",
+                    "placeholder": "Segments JSON (video id -> segments), a local stand-in for the SponsorBlock API"
+                }),
+                "skip_chapters": ("STRING", {
+                    "default": "",
+                    "placeholder": "Regex of chapter titles to cut, e.g. (?i)intro|outro|sponsor"
+                }),
+                "source_addresses": ("STRING", {
+                    "default": "",
+                    "placeholder": "Local IPs to send from, comma-separated, e.g. 192.0.2.10,192.0.2.11"
+                }),
+                "proxies": ("STRING", {
+                    "default": "",
+                    "placeholder": "Proxy URLs, comma-separated, e.g. http://127.0.0.1:8081,socks5://127.0.0.1:1080"
+                }),
+                "user_agents": ("STRING", {
+                    "default": "",
+                    "multiline": True,
+                    "placeholder": "One User-Agent per line (empty = built-in default)"
+                }),
+                "update_library": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "📚 Record source URL and title of each download in the output folder's media library index (used by YTDL Library)"
+                }),
+                "result_mode": (["full", "compact"], {
+                    "default": "full",
+                    "tooltip": "📦 compact: downloaded_files is the path of a JSONL manifest (read by index in the preview nodes) and download_info is a small summary. Use for very large batches."
+                }),
                 "custom_filename": ("STRING", {
                     "default": "%(title)s.%(ext)s",
                     "placeholder": "e.g., %(title)s.%(ext)s or %(uploader)s - %(title)s.%(ext)s"
@@ -121,6 +1830,21 @@ class YTDLDownloader:
                     "default": "",
                     "placeholder": "Path to cookies.txt file (optional)"
                 }),
+                "progress_interval": ("FLOAT", {
+                    "default": 0.5,
+                    "min": 0.0,
+                    "max": 60.0,
+                    "step": 0.1,
+                    "tooltip": "⏱️ Minimum seconds between console progress lines and per-file byte/speed events"
+                }),
+                "metrics_file": ("STRING", {
+                    "default": "",
+                    "placeholder": "Optional Prometheus textfile path (e.g. output/YTDL/ytdl.prom)"
+                }),
+                "profile_mode": (["off", "timers", "cprofile", "pyinstrument"], {
+                    "default": "off",
+                    "tooltip": "🔬 'timers' adds per-video wall/CPU timings and percentiles to download_info. 'cprofile'/'pyinstrument' also profile this run and save the report to the output folder."
+                }),
             }
         }
     
@@ -129,12 +1853,12 @@ class YTDLDownloader:
     FUNCTION = "download_media"
     CATEGORY = "audio/ytdl"
     OUTPUT_NODE = True
-    def safe_extract_info(self, ydl, url, download=False, max_retries=3):
+    def safe_extract_info(self, ydl, url, download=False, max_retries=3, process=True, on_throttled=None):
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
                     print(f"🔄 Retry attempt {attempt + 1}/{max_retries} for info extraction: {url}")
-                return ydl.extract_info(url, download=download)
+                return ydl.extract_info(url, download=download, process=process)
             except Exception as e:
                 error_msg = str(e).lower()
                 print(f"⚠️ Info extraction attempt {attempt + 1} failed for {url}: {str(e)}")
@@ -144,6 +1868,11 @@ class YTDLDownloader:
                 ]
                 is_retryable = any(err in error_msg for err in retryable_errors)
                 if attempt < max_retries - 1 and is_retryable:
+                    if on_throttled and is_throttle_error(error_msg):
+                        next_ydl = on_throttled()
+                        if next_ydl is not None:
+                            ydl = next_ydl
+                            continue
                     import time
                     wait_time = (attempt + 1) * 2
                     print(f"⏳ Waiting {wait_time}s before retry...")
@@ -154,7 +1883,7 @@ class YTDLDownloader:
                         print(f"❌ Non-retryable error, skipping retries: {str(e)}")
                     break
         return None
-    def safe_download_single_video(self, ydl, video_info, progress_hook=None, max_retries=3):
+    def safe_download_single_video(self, ydl, video_info, progress_hook=None, max_retries=3, on_throttled=None):
         video_title = video_info.get('title', 'Unknown')
         video_url = video_info.get('webpage_url', video_info.get('url', 'Unknown'))
         for attempt in range(max_retries):
@@ -163,7 +1892,10 @@ class YTDLDownloader:
                     print(f"🔄 Download retry attempt {attempt + 1}/{max_retries} for: {video_title}")
                 if progress_hook:
                     ydl.params['progress_hooks'] = [progress_hook]
-                ydl.download([video_url])
+                if attempt == 0 and video_info.get('__ytdl_pool_resolved'):
+                    ydl.process_ie_result(ydl.sanitize_info(video_info, remove_private_keys=True), download=True)
+                else:
+                    ydl.download([video_url])
                 return True
             except Exception as e:
                 error_msg = str(e).lower()
@@ -180,6 +1912,11 @@ class YTDLDownloader:
                 is_retryable = any(err in error_msg for err in retryable_errors)
                 is_format_error = any(err in error_msg for err in format_errors)
                 if attempt < max_retries - 1:
+                    if is_retryable and on_throttled and is_throttle_error(error_msg):
+                        next_ydl = on_throttled()
+                        if next_ydl is not None:
+                            ydl = next_ydl
+                            continue
                     if is_retryable:
                         import time
                         wait_time = (attempt + 1) * 3
@@ -203,17 +1940,346 @@ class YTDLDownloader:
                     print(f"❌ Max retries ({max_retries}) reached for: {video_title}")
                     break
         return False
+    def download_kept_sections(self, section_ydl, download_ydl, entry, kept_ranges, progress_hook=None,
+                               on_throttled=None):
+        import glob
+        sections = [{'start_time': start, 'end_time': end, 'index': index}
+                    for index, (start, end) in enumerate(kept_ranges, start=1)]
+        def with_sections(ydl):
+            if ydl is not None:
+                ydl.params['download_ranges'] = lambda info, ydl: sections
+            return ydl
+        print(f"✂️ Fetching {len(sections)} kept section(s): "
+              f"{', '.join(f'{start:.1f}-{end:.1f}s' for start, end in kept_ranges)}")
+        if not self.safe_download_single_video(with_sections(section_ydl), entry, progress_hook, max_retries=3,
+                                               on_throttled=(lambda: with_sections(on_throttled()))
+                                               if on_throttled else None):
+            return False
+        base = os.path.splitext(download_ydl.prepare_filename(entry))[0]
+        section_files = {}
+        for path in glob.glob(f"{glob.escape(base)}.section[0-9][0-9][0-9].*"):
+            ext = os.path.splitext(path)[1].lower()
+            if ext in AUDIO_EXTENSIONS or ext in VIDEO_EXTENSIONS:
+                section_files.setdefault(ext, []).append(path)
+        if not section_files:
+            print("❌ No downloaded sections found")
+            return False
+        ext, files = max(section_files.items(), key=lambda item: len(item[1]))
+        files.sort()
+        if len(files) == 1:
+            os.replace(files[0], f"{base}{ext}")
+        elif not concat_media_sections(files, f"{base}{ext}"):
+            return False
+        for path in files:
+            if os.path.exists(path):
+                os.remove(path)
+        return True
+    def resolve_link_info(self, ydl, info, max_redirects=5):
+        redirects = 0
+        while info and info.get('_type') in ('url', 'url_transparent') and redirects < max_redirects:
+            info = self.safe_extract_info(ydl, info['url'], download=False, process=False)
+            redirects += 1
+        if info and info.get('_type') not in ('playlist', 'multi_video'):
+            info = ydl.process_ie_result(info, download=False)
+        return info
+    def playlist_candidates(self, info, stats, is_selected, last_index, cutoff, stop_at_older_entries,
+                            known_ids, watermark_date):
+        for position, entry in enumerate(info.get('entries') or [], start=1):
+            if last_index is not None and position > last_index:
+                stats['stopped'] = 'playlist_items'
+                return
+            stats['scanned'] = position
+            if not is_selected(position):
+                continue
+            if entry is None:
+                print(f"⚠️ Skipping unavailable video #{position} in playlist")
+                stats['unavailable'] += 1
+                continue
+            entry_date = entry_upload_date(entry)
+            if known_ids and entry.get('id') in known_ids:
+                stats['known'] += 1
+                if stop_at_older_entries:
+                    stats['stopped'] = 'sync_watermark'
+                    return
+                continue
+            if stop_at_older_entries and watermark_date and entry_date and entry_date < watermark_date:
+                stats['stopped'] = 'sync_watermark'
+                return
+            if cutoff and entry_date and entry_date < cutoff:
+                stats['filtered'] += 1
+                if stop_at_older_entries:
+                    stats['stopped'] = 'date_after'
+                    return
+                continue
+            yield position, entry
+    def resolve_playlist_entries(self, ydl, candidates, metrics, extraction_pool=None, window=0):
+        if extraction_pool is None:
+            for position, entry in candidates:
+                entry_timing = {}
+                try:
+                    with metrics.stage('extract', entry_timing):
+                        if entry.get('_type') in ('url', 'url_transparent'):
+                            detailed_entry = self.safe_extract_info(ydl, entry['url'], download=False)
+                        else:
+                            detailed_entry = ydl.process_ie_result(entry, download=False)
+                except Exception as e:
+                    yield position, entry, None, str(e), entry_timing
+                    continue
+                yield position, entry, detailed_entry, None, entry_timing
+            return
+        from collections import deque
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < window:
+                    candidate = next(candidates, None)
+                    if candidate is None:
+                        break
+                    position, entry = candidate
+                    url = entry.get('url') if entry.get('_type') in ('url', 'url_transparent') else entry.get('webpage_url')
+                    pending.append((position, entry, extraction_pool.submit_extract(url)))
+                if not pending:
+                    return
+                position, entry, future = pending.popleft()
+                entry_timing = {}
+                detailed_entry, error = extraction_pool.result(future, metrics, entry_timing)
+                if detailed_entry and detailed_entry.get('_type') in ('playlist', 'multi_video'):
+                    detailed_entry, error = None, 'Nested playlists are not supported'
+                yield position, entry, detailed_entry, error, entry_timing
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+    def collect_playlist_entries(self, ydl, info, metrics, playlist_items="", max_entries=0,
+                                 date_after="", stop_at_older_entries=True, known_ids=None,
+                                 watermark_date=None, extraction_pool=None):
+        is_selected, last_index = parse_playlist_items(playlist_items)
+        cutoff = parse_date_after(date_after)
+        entries = []
+        entry_timings = []
+        stats = {'scanned': 0, 'unavailable': 0, 'filtered': 0, 'known': 0, 'stopped': None, 'unresolved': []}
+        candidates = self.playlist_candidates(info, stats, is_selected, last_index, cutoff, stop_at_older_entries,
+                                              known_ids, watermark_date)
+        window = extraction_pool.workers * 2 if extraction_pool else 0
+        if max_entries and window:
+            window = min(window, max_entries + extraction_pool.workers)
+        resolved = self.resolve_playlist_entries(ydl, candidates, metrics, extraction_pool, window)
+        try:
+            for position, entry, detailed_entry, error, entry_timing in resolved:
+                if error:
+                    print(f"⚠️ Video #{position} unavailable: {entry.get('title', 'Unknown')} - {error}")
+                    stats['unavailable'] += 1
+                    stats['unresolved'].append((entry, error))
+                    continue
+                if not detailed_entry:
+                    print(f"⚠️ Could not get detailed info for video #{position}: {entry.get('title', 'Unknown')}")
+                    stats['unavailable'] += 1
+                    stats['unresolved'].append((entry, 'Could not get detailed info'))
+                    continue
+                entry_date = entry_upload_date(detailed_entry)
+                if known_ids and detailed_entry.get('id') in known_ids:
+                    stats['known'] += 1
+                    if stop_at_older_entries:
+                        stats['stopped'] = 'sync_watermark'
+                        break
+                    continue
+                if stop_at_older_entries and watermark_date and entry_date and entry_date < watermark_date:
+                    stats['stopped'] = 'sync_watermark'
+                    break
+                if cutoff and entry_date and entry_date < cutoff:
+                    stats['filtered'] += 1
+                    if stop_at_older_entries:
+                        stats['stopped'] = 'date_after'
+                        break
+                    continue
+                entries.append(detailed_entry)
+                entry_timings.append(entry_timing)
+                if max_entries and len(entries) >= max_entries:
+                    stats['stopped'] = 'max_entries'
+                    break
+        finally:
+            resolved.close()
+        return entries, entry_timings, stats
+    def requeue_pending(self, ydl, sync_state, sync_key, link, entries, entry_timings, metrics, limit=0,
+                        exclude=()):
+        queued = {entry.get('id') for entry in entries} | set(exclude)
+        requeued = 0
+        for item in sync_state.pending_entries(sync_key):
+            if limit and len(entries) >= limit:
+                break
+            if item['id'] in queued:
+                continue
+            entry_timing = {}
+            with metrics.stage('extract', entry_timing):
+                detailed_entry = self.safe_extract_info(ydl, item['url'], download=False)
+            if not detailed_entry:
+                print(f"⚠️ Could not resolve {item['status']} entry {item.get('title') or item['url']}")
+                sync_state.fail(sync_key, link, item, 'Failed to extract video information')
+                continue
+            entries.append(detailed_entry)
+            entry_timings.append(entry_timing)
+            queued.add(item['id'])
+            requeued += 1
+        return requeued
+    def download_subtitles_only(self, yt_dlp, links, ydl_opts, abs_output_folder, subtitle_format,
+                                max_workers, download_playlist, playlist_items="", max_entries=0, metrics=None,
+                                identity_pool=None):
+        import itertools
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        sub_opts = {k: v for k, v in ydl_opts.items() if k not in ('progress_hooks', 'postprocessor_hooks',
+                                                                    'external_downloader', 'external_downloader_args')}
+        sub_opts.update({'quiet': True, 'skip_download': True, 'sleep_interval': 0, 'max_sleep_interval': 0})
+        sub_opts['postprocessors'] = [pp for pp in sub_opts.get('postprocessors', [])
+                                      if pp.get('key') == 'FFmpegSubtitlesConvertor']
+        is_selected, last_index = parse_playlist_items(playlist_items)
+        jobs = []
+        download_info = []
+        print(f"💬 Subtitle-only mode: resolving {len(links)} link(s)")
+        with yt_dlp.YoutubeDL({**sub_opts, 'extract_flat': 'in_playlist'}) as list_ydl:
+            for link in links:
+                info = self.safe_extract_info(list_ydl, link, download=False, process=False)
+                if not info:
+                    download_info.append({'url': link, 'error': 'Failed to extract video information', 'status': 'failed'})
+                    continue
+                if info.get('_type') not in ('playlist', 'multi_video'):
+                    jobs.append((info.get('webpage_url') or link, None))
+                    continue
+                limit = (max_entries or None) if download_playlist else 1
+                selected = 0
+                for position, entry in enumerate(info.get('entries') or [], start=1):
+                    if last_index is not None and position > last_index:
+                        break
+                    if entry is None or not is_selected(position):
+                        continue
+                    jobs.append((entry.get('url') or entry.get('webpage_url'), position))
+                    selected += 1
+                    if limit and selected >= limit:
+                        break
+        local = threading.local()
+        instances = []
+        instances_lock = threading.Lock()
+        def fetch(job):
+            import time
+            url, position = job
+            identity = identity_pool.acquire() if identity_pool else None
+            key = identity['index'] if identity else None
+            if not hasattr(local, 'ydls'):
+                local.ydls = {}
+            if key not in local.ydls:
+                local.ydls[key] = yt_dlp.YoutubeDL(identity_pool.options(sub_opts, identity) if identity else sub_opts)
+                with instances_lock:
+                    instances.append(local.ydls[key])
+            ydl = local.ydls[key]
+            started = time.perf_counter()
+            try:
+                info = ydl.extract_info(url, download=True)
+            except Exception as e:
+                if identity:
+                    identity_pool.release(identity, throttled=is_throttle_error(str(e)) or None)
+                return {'url': url, 'playlist_index': position, 'error': str(e), 'status': 'failed'}, []
+            if identity:
+                identity_pool.release(identity, throttled=False)
+            files = find_subtitle_files(info or {}, ydl.prepare_filename(info) if info else None)
+            if subtitle_format == 'json':
+                files = [convert_vtt_to_json(path) if path.endswith('.vtt') else path for path in files]
+            if metrics is not None:
+                metrics.add_stage_time('download', time.perf_counter() - started)
+            record = {
+                'url': url,
+                'title': (info or {}).get('title'),
+                'playlist_index': position,
+                'subtitle_files': files,
+                'status': 'success' if files else 'no_subtitles',
+            }
+            return record, files
+        subtitle_files = []
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for record, files in executor.map(fetch, [job for job in jobs if job[0]]):
+                    download_info.append(record)
+                    subtitle_files.extend(files)
+                    if record['status'] == 'success':
+                        print(f"💬 {record.get('title') or record['url']}: {len(files)} subtitle file(s)")
+                    elif record['status'] == 'no_subtitles':
+                        print(f"⚠️ No matching subtitles for {record.get('title') or record['url']}")
+                    else:
+                        print(f"❌ {record['url']}: {record['error']}")
+        finally:
+            for ydl in instances:
+                ydl.close()
+        successful = sum(1 for record in download_info if record['status'] == 'success')
+        print(f"💬 Subtitles written for {successful}/{len(download_info)} item(s) in {abs_output_folder}")
+        summary = {
+            'summary': {
+                'total_attempted': len(download_info),
+                'successful': successful,
+                'failed': sum(1 for record in download_info if record['status'] == 'failed'),
+                'no_subtitles': sum(1 for record in download_info if record['status'] == 'no_subtitles'),
+                'media_type': 'subtitles',
+                'format': subtitle_format,
+            },
+            'downloads': download_info,
+        }
+        if identity_pool:
+            summary['summary']['identities'] = identity_pool.to_dict()
+        if metrics is not None:
+            summary['metrics'] = metrics.to_dict()
+        return ('\n'.join(subtitle_files), json.dumps(summary, indent=2))
+    def resolve_downloaded_file(self, ydl, entry, abs_output_folder, audio_only, audio_format,
+                                video_format, enable_time_crop):
+        expected_filename = ydl.prepare_filename(entry)
+        if enable_time_crop or (audio_only and audio_format != 'm4a'):
+            base_name = os.path.splitext(expected_filename)[0]
+            if audio_only:
+                expected_filename = f"{base_name}.{audio_format}"
+            else:
+                expected_filename = f"{base_name}.{video_format}"
+        if os.path.exists(expected_filename):
+            return expected_filename
+        import glob
+        base_pattern = glob.escape(os.path.splitext(expected_filename)[0])
+        if audio_only:
+            possible_extensions = [f'.{audio_format}', '.mp3', '.m4a', '.wav', '.flac', '.ogg']
+        else:
+            possible_extensions = [f'.{video_format}', '.mp4', '.webm', '.mkv']
+        for ext in possible_extensions:
+            matches = glob.glob(f"{base_pattern}*{ext}")
+            if matches:
+                return matches[0]
+        potential_files = []
+        extensions = ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.mp4', '.mkv', '.webm']
+        with os.scandir(abs_output_folder) as it:
+            for dir_entry in it:
+                if dir_entry.is_file() and any(ext in dir_entry.name.lower() for ext in extensions):
+                    potential_files.append((dir_entry.stat().st_mtime, dir_entry.path))
+        if potential_files:
+            return max(potential_files)[1]
+        return None
     def download_media(self, links: List[str], output_folder: str, media_type: str,
                       audio_format: str, video_format: str, quality: str,
                       enable_time_crop: bool, crop_start: str, crop_end: str,
                       use_cookies: bool, browser_for_cookies: str,
                       download_playlist: bool, continue_on_error: bool,
-                      custom_filename: str = "%(title)s.%(ext)s", cookie_file: str = ""):
+                      custom_filename: str = "%(title)s.%(ext)s", cookie_file: str = "",
+                      progress_interval: float = 0.5, metrics_file: str = "",
+                      profile_mode: str = "off", playlist_items: str = "", max_entries: int = 0,
+                      date_after: str = "", stop_at_older_entries: bool = True,
+                      sync_mode: bool = False, sync_state_file: str = "", result_mode: str = "full",
+                      update_library: bool = False, download_subtitles: bool = False,
+                      auto_subtitles: bool = False, subtitle_languages: str = "en.*,en",
+                      subtitle_format: str = "srt", skip_media: bool = False, subtitle_workers: int = 8,
+                      max_download_rate: str = "", max_total_bytes: str = "", min_free_disk: str = "",
+                      naming_mode: str = "template", extraction_workers: int = 0,
+                      skip_segments: str = "", segments_file: str = "", skip_chapters: str = "",
+                      source_addresses: str = "", proxies: str = "", user_agents: str = ""):
         yt_dlp = ensure_yt_dlp()
-        def update_progress(current_step, total_steps, status_message):
+        import time
+        from contextlib import nullcontext
+        parse_playlist_items(playlist_items)
+        metrics = DownloadMetrics(len(links) * 3, progress_interval)
+        def update_progress(current_step, total_steps, status_message, force=False):
             if total_steps > 0:
-                percent = (current_step / total_steps) * 100
-                print(f"📊 [{percent:5.1f}%] {status_message}")
+                metrics.update_progress(current_step, status_message, force=force)
         def check_interrupted():
             
             try:
@@ -276,6 +2342,36 @@ class YTDLDownloader:
             else:
                 print("⚠️ No valid crop times provided. Disabling time crop.")
                 enable_time_crop = False
+        skip_categories = {c.strip().lower() for c in (skip_segments or "").split(',') if c.strip()}
+        unknown_categories = skip_categories - set(SPONSORBLOCK_CATEGORIES) - {'all'}
+        if unknown_categories:
+            print(f"⚠️ Unknown segment categories (matched as given): {', '.join(sorted(unknown_categories))}")
+        segments = {}
+        if skip_categories:
+            if segments_file and segments_file.strip():
+                try:
+                    segments = load_segments_file(segments_file.strip())
+                    print(f"🧩 Loaded segments for {len(segments)} video(s) from {segments_file.strip()}")
+                except (OSError, ValueError, AttributeError) as e:
+                    print(f"⚠️ Could not read segments file: {e}")
+            else:
+                print("⚠️ skip_segments needs a segments_file - ignoring categories")
+        chapter_pattern = None
+        if skip_chapters and skip_chapters.strip():
+            try:
+                chapter_pattern = re.compile(skip_chapters.strip())
+            except re.error as e:
+                print(f"⚠️ Invalid skip_chapters pattern: {e}")
+        segment_selection = bool((skip_categories and segments) or chapter_pattern)
+        if segment_selection and not ffmpeg_available:
+            print("⚠️ Segment skipping requires ffmpeg - downloading full videos")
+            segment_selection = False
+        crop_window = (start_time or 0.0, end_time) if enable_time_crop else (0.0, None)
+        if segment_selection:
+            print(f"✂️ Segment skipping: {', '.join(sorted(skip_categories)) if segments else 'no categories'}"
+                  f"{f' + chapters matching {chapter_pattern.pattern}' if chapter_pattern else ''}")
+        total_removed_seconds = 0.0
+        total_segmented = 0
         if not output_folder or output_folder.strip() == "":
             output_folder = "output/YTDL/"
         output_folder = output_folder.rstrip('/\\')
@@ -377,7 +2473,7 @@ class YTDLDownloader:
             'fragment_retries': 3,
         })
         ydl_opts['http_headers'] = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': DEFAULT_USER_AGENT
         }
         postprocessors = []
         if audio_only:
@@ -466,209 +2562,458 @@ class YTDLDownloader:
                 }
                 ydl_opts['external_downloader'] = 'ffmpeg'
                 print(f"✂️ Time cropping configured: {' '.join(external_downloader_args)}")
+        if skip_media and not (download_subtitles or auto_subtitles):
+            print("💬 skip_media is enabled - fetching uploaded subtitles")
+            download_subtitles = True
+        if download_subtitles or auto_subtitles:
+            languages = [lang.strip() for lang in subtitle_languages.split(',') if lang.strip()] or ['en.*', 'en']
+            ydl_opts.update({
+                'writesubtitles': download_subtitles,
+                'writeautomaticsub': auto_subtitles,
+                'subtitleslangs': languages,
+                'subtitlesformat': 'srt/vtt/best' if subtitle_format == 'srt' else 'vtt/best',
+            })
+            if subtitle_format == 'srt':
+                if ffmpeg_available:
+                    postprocessors.append({'key': 'FFmpegSubtitlesConvertor', 'format': 'srt', 'when': 'before_dl'})
+                else:
+                    print("⚠️ SRT conversion requires ffmpeg - subtitles will be kept in their original format")
+            print(f"💬 Subtitles: {', '.join(languages)} as {subtitle_format}"
+                  f"{' (including automatic captions)' if auto_subtitles else ''}")
         if postprocessors:
             ydl_opts['postprocessors'] = postprocessors
+        identity_pool = get_identity_pool(source_addresses, proxies, user_agents)
+        if identity_pool:
+            print(f"🔀 Identity pool: {', '.join(identity_pool.label(identity) for identity in identity_pool.identities)}")
+        if skip_media:
+            return self.download_subtitles_only(
+                yt_dlp, links, ydl_opts, abs_output_folder, subtitle_format, subtitle_workers,
+                download_playlist, playlist_items, max_entries, metrics, identity_pool)
+        namer = OutputNamer(abs_output_folder, naming_mode)
+        identity_ydls = {}
+        section_ydls = {}
+        sync_state = None
+        try:
+            ydl_opts['outtmpl'] = namer.apply_template(clean_filename)
+            output_extensions = [audio_format] if audio_only else [video_format]
+            if naming_mode != "template":
+                print(f"📝 Naming mode: {namer.mode}")
         
-        print(f"🎯 Selected format string: {ydl_opts.get('format', 'best')}")
-        if not use_cookies:
-            print("⚠️ WARNING: No cookies enabled - YouTube may limit quality to 720p or lower")
-            print("💡 TIP: Enable cookies (firefox recommended) for access to 1080p+ formats")
-        def progress_hook(d):
-            if d['status'] == 'downloading':
-                if 'total_bytes' in d or 'total_bytes_estimate' in d:
-                    total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-                    downloaded = d.get('downloaded_bytes', 0)
-                    if total > 0:
-                        percent = (downloaded / total) * 100
-                        speed = d.get('speed', 0)
-                        speed_str = f"{speed/1024/1024:.1f}MB/s" if speed else "Unknown"
-                        filename = d.get('filename', 'Unknown')
-                        basename = os.path.basename(filename) if filename else 'Unknown'
-                        base_step = (link_idx * 3) + 1
-                        detailed_progress = base_step + (percent / 100.0)
-                        update_progress(int(detailed_progress), total_steps, f"Downloading {basename[:30]} - {percent:.1f}% ({speed_str})")
-                        bar_length = 40
-                        filled_length = int(bar_length * percent / 100)
-                        bar = '█' * filled_length + '░' * (bar_length - filled_length)
-                        print(f"\r⬇️ [{bar}] {percent:5.1f}% | {speed_str} | {basename[:30]}", end='', flush=True)
-            elif d['status'] == 'finished':
-                filename = d.get('filename', 'Unknown')
-                basename = os.path.basename(filename) if filename else 'Unknown'
-                print(f"\n✅ Download completed: {basename}")
-                update_progress((link_idx * 3) + 2, total_steps, f"Download completed: {basename}")
-            elif d['status'] == 'processing':
-                filename = d.get('filename', 'Unknown')
-                basename = os.path.basename(filename) if filename else 'Unknown'
-                print(f"\r⚙️ Processing: {basename[:40]}", end='', flush=True)
-                update_progress((link_idx * 3) + 2, total_steps, f"Processing: {basename}")
-            elif d['status'] == 'error':
-                filename = d.get('filename', 'Unknown')
-                basename = os.path.basename(filename) if filename else 'Unknown'
-                print(f"\n❌ Download error: {basename}")
-                update_progress((link_idx * 3) + 2, total_steps, f"Error downloading: {basename}")
-        total_links = len(links)
-        total_attempted = 0
-        total_successful = 0
-        total_failed = 0
-        for link_idx, link in enumerate(links):
-            if check_interrupted():
-                print("\n🛑 Download cancelled by user")
-                break
-            current_step = link_idx * 3
-            update_progress(current_step, total_steps, f"Extracting info for link {link_idx + 1}/{total_links}")
-            print(f"\n{'='*60}")
-            print(f"🔗 Processing link {link_idx + 1}/{total_links}")
-            print(f"🌐 URL: {link}")
-            print(f"{'='*60}")
-            try:
-                with yt_dlp.YoutubeDL({'quiet': True, **{k: v for k, v in ydl_opts.items() if k not in ['progress_hooks']}}) as info_ydl:
-                    info = self.safe_extract_info(info_ydl, link, download=False)
-                if not info:
-                    print(f"❌ Could not extract information for {link}")
-                    download_info.append({
-                        'url': link,
-                        'error': 'Failed to extract video information',
-                        'status': 'failed'
-                    })
-                    total_failed += 1
-                    continue
-                if 'entries' in info:
-                    entries = []
-                    unavailable_count = 0
-                    original_entries = list(info['entries']) if info['entries'] else []
-                    for i, entry in enumerate(original_entries):
-                        if entry is None:
-                            print(f"⚠️ Skipping unavailable video #{i+1} in playlist")
-                            unavailable_count += 1
-                            continue
-                        if entry and 'url' in entry:
-                            try:
-                                with yt_dlp.YoutubeDL({'quiet': True}) as entry_ydl:
-                                    detailed_entry = entry_ydl.extract_info(entry['url'], download=False)
-                                    if detailed_entry:
-                                        entries.append(detailed_entry)
-                                    else:
-                                        print(f"⚠️ Could not get detailed info for video #{i+1}: {entry.get('title', 'Unknown')}")
-                                        unavailable_count += 1
-                            except Exception as e:
-                                print(f"⚠️ Video #{i+1} unavailable: {entry.get('title', 'Unknown')} - {str(e)}")
-                                unavailable_count += 1
+            print(f"🎯 Selected format string: {ydl_opts.get('format', 'best')}")
+            if not use_cookies:
+                print("⚠️ WARNING: No cookies enabled - YouTube may limit quality to 720p or lower")
+                print("💡 TIP: Enable cookies (firefox recommended) for access to 1080p+ formats")
+            def progress_hook(d):
+                if d['status'] == 'downloading':
+                    if quota.enabled:
+                        quota.on_progress(d)
+                    if not metrics.record_file_progress(d):
+                        return
+                    if 'total_bytes' in d or 'total_bytes_estimate' in d:
+                        total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
+                        downloaded = d.get('downloaded_bytes', 0)
+                        if total > 0:
+                            percent = (downloaded / total) * 100
+                            speed = d.get('speed', 0)
+                            speed_str = f"{speed/1024/1024:.1f}MB/s" if speed else "Unknown"
+                            filename = d.get('filename', 'Unknown')
+                            basename = os.path.basename(filename) if filename else 'Unknown'
+                            base_step = (link_idx * 3) + 1
+                            detailed_progress = base_step + (percent / 100.0)
+                            update_progress(int(detailed_progress), total_steps, f"Downloading {basename[:30]} - {percent:.1f}% ({speed_str})")
+                            bar_length = 40
+                            filled_length = int(bar_length * percent / 100)
+                            bar = '█' * filled_length + '░' * (bar_length - filled_length)
+                            print(f"\r⬇️ [{bar}] {percent:5.1f}% | {speed_str} | {basename[:30]}", end='', flush=True)
+                elif d['status'] == 'finished':
+                    if quota.enabled:
+                        quota.on_progress(d)
+                    metrics.finish_file(d)
+                    filename = d.get('filename', 'Unknown')
+                    basename = os.path.basename(filename) if filename else 'Unknown'
+                    print(f"\n✅ Download completed: {basename}")
+                    update_progress((link_idx * 3) + 2, total_steps, f"Download completed: {basename}")
+                elif d['status'] == 'processing':
+                    if not metrics.record_file_progress(d):
+                        return
+                    filename = d.get('filename', 'Unknown')
+                    basename = os.path.basename(filename) if filename else 'Unknown'
+                    print(f"\r⚙️ Processing: {basename[:40]}", end='', flush=True)
+                    update_progress((link_idx * 3) + 2, total_steps, f"Processing: {basename}")
+                elif d['status'] == 'error':
+                    filename = d.get('filename', 'Unknown')
+                    basename = os.path.basename(filename) if filename else 'Unknown'
+                    print(f"\n❌ Download error: {basename}")
+                    update_progress((link_idx * 3) + 2, total_steps, f"Error downloading: {basename}")
+            if sync_mode:
+                state_path = sync_state_file.strip() if sync_state_file and sync_state_file.strip() else \
+                    os.path.join(abs_output_folder, '.ytdl_sync_state.json')
+                sync_state = SyncState(state_path)
+                print(f"🔁 Sync mode: ENABLED - state file {state_path}")
+            total_up_to_date = 0
+            quota = DownloadQuota(abs_output_folder,
+                                  parse_size_limit(max_download_rate, 'max_download_rate'),
+                                  parse_size_limit(max_total_bytes, 'max_total_bytes'),
+                                  parse_size_limit(min_free_disk, 'min_free_disk'))
+            if quota.max_download_rate:
+                ydl_opts['ratelimit'] = quota.max_download_rate
+            if quota.enabled:
+                print(f"🚦 Quota: {json.dumps({k: v for k, v in quota.to_dict().items() if v and k != 'throttled_seconds'})}")
+            total_quota_skipped = 0
+            info_opts = {'quiet': True, **{k: v for k, v in ydl_opts.items() if k not in ['progress_hooks', 'postprocessor_hooks']}}
+            extraction_pool = None
+            if extraction_workers:
+                try:
+                    extraction_pool = get_extraction_pool(info_opts, extraction_workers)
+                    extraction_pool.keep_subtitles = download_subtitles or auto_subtitles
+                except Exception as e:
+                    print(f"⚠️ Could not start extraction workers, extracting in-process: {e}")
+            library = MediaLibrary(abs_output_folder) if update_library else None
+            detailed_timing = profile_mode != "off"
+            active_timing = {'timings': None}
+            postprocess_started = {}
+            def postprocessor_hook(d):
+                key = (d.get('postprocessor'), (d.get('info_dict') or {}).get('id'))
+                if d.get('status') == 'started':
+                    postprocess_started[key] = (time.perf_counter(), time.process_time())
+                elif d.get('status') == 'finished' and key in postprocess_started:
+                    wall_started, cpu_started = postprocess_started.pop(key)
+                    metrics.add_stage_time('postprocess', time.perf_counter() - wall_started,
+                                           time.process_time() - cpu_started, active_timing['timings'])
+            ydl_opts['postprocessor_hooks'] = [postprocessor_hook]
+            active_identity = {'current': None}
+            def identity_ydl(kind, identity):
+                key = (kind, identity['index'])
+                if key not in identity_ydls:
+                    opts = info_opts if kind == 'info' else section_options(ydl_opts) if kind == 'sections' else ydl_opts
+                    identity_ydls[key] = yt_dlp.YoutubeDL(identity_pool.options(opts, identity))
+                return identity_ydls[key]
+            def next_identity():
+                throttled = active_identity['current']
+                identity_pool.release(throttled, throttled=True)
+                active_identity['current'] = identity_pool.acquire(exclude=throttled)
+                wait_time = identity_pool.cooldown_remaining(active_identity['current'])
+                if wait_time > 0:
+                    print(f"\n⏳ {identity_pool.label(throttled)} is throttled and no identity is ready - waiting "
+                          f"{wait_time:.0f}s for {identity_pool.label(active_identity['current'])}")
+                    time.sleep(wait_time)
+                else:
+                    print(f"\n🔀 {identity_pool.label(throttled)} is throttled - retrying via "
+                          f"{identity_pool.label(active_identity['current'])}")
+                return active_identity['current']
+            def finish_identity(throttled=None):
+                if active_identity['current'] is not None:
+                    identity_pool.release(active_identity['current'], throttled)
+                    active_identity['current'] = None
+            total_links = len(links)
+            total_attempted = 0
+            total_successful = 0
+            total_failed = 0
+            profiler = RunProfiler(profile_mode, abs_output_folder)
+            profiler.start()
+            for link_idx, link in enumerate(links):
+                if check_interrupted():
+                    print("\n🛑 Download cancelled by user")
+                    break
+                current_step = link_idx * 3
+                update_progress(current_step, total_steps, f"Extracting info for link {link_idx + 1}/{total_links}")
+                print(f"\n{'='*60}")
+                print(f"🔗 Processing link {link_idx + 1}/{total_links}")
+                print(f"🌐 URL: {link}")
+                print(f"{'='*60}")
+                try:
+                    link_timing = {}
+                    playlist_stats = None
+                    sync_key = normalize_media_url(link)[1] if sync_state else None
+                    known_ids = sync_state.known_ids(sync_key) if sync_state else None
+                    watermark_date = sync_state.watermark_date(sync_key) if sync_state else None
+                    info = None
+                    if identity_pool:
+                        active_identity['current'] = identity_pool.acquire()
+                    extract_throttled = (lambda: identity_ydl('info', next_identity())) if identity_pool else None
+                    try:
+                        with (nullcontext(identity_ydl('info', active_identity['current']))
+                              if identity_pool else yt_dlp.YoutubeDL(info_opts)) as info_ydl:
+                            if extraction_pool and not is_listing_url(link):
+                                info, _ = extraction_pool.result(extraction_pool.submit_extract(link), metrics, link_timing)
+                                if info and info.get('_type') in ('playlist', 'multi_video'):
+                                    with metrics.stage('extract', link_timing):
+                                        info = self.safe_extract_info(info_ydl, link, download=False, process=False,
+                                                                      on_throttled=extract_throttled)
+                            else:
+                                with metrics.stage('extract', link_timing):
+                                    info = self.safe_extract_info(info_ydl, link, download=False, process=False,
+                                                                  on_throttled=extract_throttled)
+                            if identity_pool:
+                                info_ydl = identity_ydl('info', active_identity['current'])
+                            if not (extraction_pool and not is_listing_url(link)):
+                                with metrics.stage('extract', link_timing):
+                                    info = self.resolve_link_info(info_ydl, info)
+                            if info and info.get('_type') in ('playlist', 'multi_video'):
+                                entries, entry_timings, playlist_stats = self.collect_playlist_entries(
+                                    info_ydl, info, metrics, playlist_items,
+                                    max_entries if download_playlist else 1, date_after, stop_at_older_entries,
+                                    known_ids, watermark_date, extraction_pool)
+                                if sync_state:
+                                    playlist_stats['requeued'] = self.requeue_pending(
+                                        info_ydl, sync_state, sync_key, link, entries, entry_timings, metrics,
+                                        max_entries if download_playlist else 1,
+                                        exclude=[entry.get('id') for entry, _ in playlist_stats['unresolved']])
+                                    for entry, error in playlist_stats['unresolved']:
+                                        sync_state.fail(sync_key, link, entry, error)
+                    finally:
+                        if identity_pool:
+                            finish_identity(False if info else None)
+                    if not info:
+                        print(f"❌ Could not extract information for {link}")
+                        download_info.append({
+                            'url': link,
+                            'error': 'Failed to extract video information',
+                            'status': 'failed'
+                        })
+                        total_failed += 1
+                        continue
+                    if playlist_stats is not None:
+                        total_videos = len(entries)
+                        if download_playlist:
+                            print(f"📋 Scanned {playlist_stats['scanned']} playlist entries ({total_videos} selected)")
+                            if playlist_stats['unavailable'] > 0:
+                                print(f"⚠️ {playlist_stats['unavailable']} videos are unavailable and will be skipped")
+                            if playlist_stats['known'] > 0:
+                                print(f"🔁 {playlist_stats['known']} videos were already synced and were skipped")
+                            if playlist_stats.get('requeued'):
+                                print(f"🔁 {playlist_stats['requeued']} entries left over from earlier syncs were queued again")
+                            if playlist_stats['filtered'] > 0:
+                                print(f"📅 {playlist_stats['filtered']} videos are older than {date_after} and were skipped")
+                            if playlist_stats['stopped']:
+                                print(f"⏹️ Stopped paginating early ({playlist_stats['stopped']})")
                         else:
-                            entries.append(entry)
-                    total_videos = len(entries)
-                    original_count = len(original_entries)
-                    if download_playlist:
-                        print(f"📋 Found playlist with {original_count} videos ({total_videos} available)")
-                        if unavailable_count > 0:
-                            print(f"⚠️ {unavailable_count} videos are unavailable and will be skipped")
+                            print(f"📋 Found playlist (downloading only first available)")
                     else:
-                        print(f"📋 Found playlist with {original_count} videos (downloading only first available)")
-                        entries = entries[:1] if entries else []
-                        total_videos = len(entries)
-                else:
-                    entries = [info]
-                    total_videos = 1
-                    print("🎵 Single video detected")
-                if not entries:
-                    print("❌ No available videos to download")
-                    download_info.append({
-                        'url': link,
-                        'error': 'No available videos found',
-                        'status': 'failed'
-                    })
-                    total_failed += 1
-                    continue
-                print(f"\n🚀 Starting download of {total_videos} available video(s)...")
-                current_step = link_idx * 3 + 1
-                update_progress(current_step, total_steps, f"Downloading from link {link_idx + 1}/{total_links}")
-                with yt_dlp.YoutubeDL(ydl_opts) as download_ydl:
-                    for video_idx, entry in enumerate(entries):
-                        if entry is None:
-                            continue
-                        total_attempted += 1
-                        video_title = entry.get('title', 'Unknown')
-                        video_url = entry.get('webpage_url', entry.get('url', 'Unknown'))
-                        try:
-                            if total_videos > 1:
-                                print(f"\n🎹 Video {video_idx + 1}/{total_videos}: {video_title}")
-                            if enable_time_crop:
-                                video_duration = entry.get('duration', 0)
-                                if video_duration and end_time and end_time > video_duration:
-                                    print(f"⚠️ End time ({end_time}s) is longer than video duration ({video_duration}s)")
-                                    print(f"   Adjusting end time to video duration")
-                            success = self.safe_download_single_video(download_ydl, entry, progress_hook, max_retries=3)
-                            if success:
-                                current_step = link_idx * 3 + 2
-                                update_progress(current_step, total_steps, f"Processing downloaded file from link {link_idx + 1}/{total_links}")
-                                expected_filename = download_ydl.prepare_filename(entry)
-                                if enable_time_crop or (audio_only and audio_format != 'm4a'):
-                                    base_name = os.path.splitext(expected_filename)[0]
-                                    if audio_only:
-                                        expected_filename = f"{base_name}.{audio_format}"
-                                    else:
-                                        expected_filename = f"{base_name}.{video_format}"
-                                actual_file = None
-                                if os.path.exists(expected_filename):
-                                    actual_file = expected_filename
+                        entries = [info]
+                        entry_timings = [link_timing]
+                        total_videos = 1
+                        print("🎵 Single video detected")
+                        if known_ids and info.get('id') in known_ids:
+                            entries = []
+                    if not entries and sync_state and (playlist_stats is None or playlist_stats['known'] > 0
+                                                       or playlist_stats['stopped'] == 'sync_watermark'):
+                        print("✅ Up to date - no new entries since the last sync")
+                        download_info.append({
+                            'url': link,
+                            'status': 'up_to_date'
+                        })
+                        total_up_to_date += 1
+                        continue
+                    if not entries:
+                        print("❌ No available videos to download")
+                        download_info.append({
+                            'url': link,
+                            'error': 'No available videos found',
+                            'status': 'failed'
+                        })
+                        total_failed += 1
+                        continue
+                    print(f"\n🚀 Starting download of {total_videos} available video(s)...")
+                    current_step = link_idx * 3 + 1
+                    update_progress(current_step, total_steps, f"Downloading from link {link_idx + 1}/{total_links}")
+                    with yt_dlp.YoutubeDL(ydl_opts) as download_ydl:
+                        for video_idx, entry in enumerate(entries):
+                            if entry is None:
+                                continue
+                            quota_reason = quota.check_entry(entry) if quota.enabled else None
+                            if quota_reason:
+                                quota_status = 'deferred' if sync_state else 'skipped_quota'
+                                print(f"🚦 {'Deferring' if sync_state else 'Skipping'} {entry.get('title', 'Unknown')}: {quota_reason}")
+                                if sync_state:
+                                    sync_state.defer(sync_key, link, entry)
+                                download_info.append({
+                                    'url': entry.get('webpage_url', entry.get('url', 'Unknown')),
+                                    'title': entry.get('title', 'Unknown'),
+                                    'reason': quota_reason,
+                                    'playlist_index': video_idx + 1 if total_videos > 1 else None,
+                                    'status': quota_status
+                                })
+                                total_quota_skipped += 1
+                                continue
+                            total_attempted += 1
+                            video_title = entry.get('title', 'Unknown')
+                            video_url = entry.get('webpage_url', entry.get('url', 'Unknown'))
+                            video_timing = {stage: dict(slot) for stage, slot in entry_timings[video_idx].items()}
+                            active_timing['timings'] = video_timing
+                            records_before = len(download_info)
+                            target_lock = None
+                            success = False
+                            try:
+                                if total_videos > 1:
+                                    print(f"\n🎹 Video {video_idx + 1}/{total_videos}: {video_title}")
+                                if enable_time_crop:
+                                    video_duration = entry.get('duration', 0)
+                                    if video_duration and end_time and end_time > video_duration:
+                                        print(f"⚠️ End time ({end_time}s) is longer than video duration ({video_duration}s)")
+                                        print(f"   Adjusting end time to video duration")
+                                kept_ranges, removed_segments = plan_kept_ranges(
+                                    entry, skip_categories, segments, chapter_pattern, crop_window) \
+                                    if segment_selection else (None, [])
+                                if kept_ranges is not None and not kept_ranges:
+                                    print(f"✂️ Nothing left of {video_title} after removing segments - skipping")
+                                    download_info.append({
+                                        'url': video_url,
+                                        'title': video_title,
+                                        'reason': 'All content removed by segment selection',
+                                        'playlist_index': video_idx + 1 if total_videos > 1 else None,
+                                        'status': 'skipped_segments'
+                                    })
+                                    total_attempted -= 1
+                                    continue
+                                target_stem = namer.target_stem(download_ydl.prepare_filename(entry))
+                                target_lock = namer.lock(target_stem).acquire()
+                                existing_file = namer.existing_output(target_stem, output_extensions,
+                                                                      OutputNamer.video_key(entry))
+                                if existing_file:
+                                    print(f"♻️ Already downloaded: {os.path.basename(existing_file)}")
+                                    success = True
                                 else:
-                                    import glob
-                                    base_pattern = os.path.splitext(expected_filename)[0]
-                                    if audio_only:
-                                        possible_extensions = [f'.{audio_format}', '.mp3', '.m4a', '.wav', '.flac', '.ogg']
+                                    postprocess_before = metrics.stage_seconds['postprocess']
+                                    postprocess_cpu_before = metrics.stage_cpu_seconds['postprocess']
+                                    download_started = time.perf_counter()
+                                    download_cpu_started = time.process_time()
+                                    if identity_pool:
+                                        active_identity['current'] = identity_pool.acquire()
+                                    if kept_ranges:
+                                        if identity_pool:
+                                            section_ydl = identity_ydl('sections', active_identity['current'])
+                                        else:
+                                            section_ydl = section_ydls.get('default')
+                                            if section_ydl is None:
+                                                section_ydl = section_ydls['default'] = yt_dlp.YoutubeDL(
+                                                    section_options(ydl_opts))
+                                        success = self.download_kept_sections(
+                                            section_ydl, download_ydl, entry, kept_ranges, progress_hook,
+                                            on_throttled=(lambda: identity_ydl('sections', next_identity()))
+                                            if identity_pool else None)
+                                    else:
+                                        success = self.safe_download_single_video(
+                                            identity_ydl('download', active_identity['current'])
+                                            if identity_pool else download_ydl, entry, progress_hook, max_retries=3,
+                                            on_throttled=(lambda: identity_ydl('download', next_identity()))
+                                            if identity_pool else None)
+                                    metrics.add_stage_time(
+                                        'download',
+                                        time.perf_counter() - download_started
+                                        - (metrics.stage_seconds['postprocess'] - postprocess_before),
+                                        time.process_time() - download_cpu_started
+                                        - (metrics.stage_cpu_seconds['postprocess'] - postprocess_cpu_before),
+                                        video_timing)
+                                if success:
+                                    current_step = link_idx * 3 + 2
+                                    update_progress(current_step, total_steps, f"Processing downloaded file from link {link_idx + 1}/{total_links}")
+                                    reused = bool(existing_file)
+                                    with metrics.stage('file_resolve', video_timing):
+                                        actual_file = existing_file or self.resolve_downloaded_file(
+                                            download_ydl, entry, namer.staging_dir, audio_only, audio_format,
+                                            video_format, enable_time_crop)
+                                        if actual_file and not existing_file and os.path.exists(actual_file):
+                                            actual_file, reused = namer.commit(actual_file, target_stem,
+                                                                               OutputNamer.video_key(entry))
+                                    if actual_file and os.path.exists(actual_file):
+                                        downloaded_files.append(actual_file)
+                                        file_info = {
+                                            'url': video_url,
+                                            'title': video_title,
+                                            'duration': entry.get('duration', 0),
+                                            'file_path': actual_file,
+                                            'file_size': os.path.getsize(actual_file),
+                                            'playlist_index': video_idx + 1 if total_videos > 1 else None,
+                                            'status': 'success'
+                                        }
+                                        if reused:
+                                            file_info['reused'] = True
+                                        if identity_pool and active_identity['current']:
+                                            file_info['identity'] = identity_pool.label(active_identity['current'])
+                                        if download_subtitles or auto_subtitles:
+                                            subtitle_files = find_subtitle_files(entry, actual_file)
+                                            if subtitle_format == 'json':
+                                                subtitle_files = [convert_vtt_to_json(path) if path.endswith('.vtt') else path
+                                                                  for path in subtitle_files]
+                                            file_info['subtitle_files'] = subtitle_files
+                                        if kept_ranges and not reused:
+                                            kept_seconds = sum(end - start for start, end in kept_ranges)
+                                            removed_seconds = sum(end - start for start, end in merge_ranges(
+                                                (segment['start'], segment['end']) for segment in removed_segments))
+                                            file_info['segments'] = {
+                                                'removed': removed_segments,
+                                                'kept_ranges': [[round(start, 3), round(end, 3)] for start, end in kept_ranges],
+                                                'kept_seconds': round(kept_seconds, 3),
+                                                'removed_seconds': round(removed_seconds, 3),
+                                                'saved_ratio': round(removed_seconds / (kept_seconds + removed_seconds), 4)
+                                                if kept_seconds + removed_seconds else 0.0
+                                            }
+                                            total_removed_seconds += removed_seconds
+                                            total_segmented += 1
+                                        if enable_time_crop:
+                                            file_info.update({
+                                                'cropped': True,
+                                                'crop_start': start_time,
+                                                'crop_end': end_time,
+                                                'crop_duration': duration
+                                            })
+                                        download_info.append(file_info)
+                                        print(f"💾 Saved: {os.path.basename(actual_file)}")
+                                        total_successful += 1
+                                        if sync_state:
+                                            sync_state.record(sync_key, link, entry.get('id'), entry_upload_date(entry))
+                                        if library:
+                                            library.record_download(actual_file, video_url, video_title)
                                     else:
-                                        possible_extensions = [f'.{video_format}', '.mp4', '.webm', '.mkv']
-                                    for ext in possible_extensions:
-                                        pattern = f"{base_pattern}*{ext}"
-                                        matches = glob.glob(pattern)
-                                        if matches:
-                                            actual_file = matches[0]
-                                            break
-                                    if not actual_file:
-                                        potential_files = []
-                                        for file in os.listdir(abs_output_folder):
-                                            file_path = os.path.join(abs_output_folder, file)
-                                            if os.path.isfile(file_path):
-                                                extensions = ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.mp4', '.mkv', '.webm']
-                                                if any(ext in file.lower() for ext in extensions):
-                                                    potential_files.append(file_path)
-                                        if potential_files:
-                                            actual_file = max(potential_files, key=os.path.getmtime)
-                                if actual_file and os.path.exists(actual_file):
-                                    downloaded_files.append(actual_file)
-                                    file_info = {
+                                        print(f"⚠️ Downloaded file not found for: {video_title}")
+                                        if sync_state:
+                                            sync_state.fail(sync_key, link, entry, 'Downloaded file not found')
+                                        download_info.append({
+                                            'url': video_url,
+                                            'title': video_title,
+                                            'error': 'Downloaded file not found',
+                                            'playlist_index': video_idx + 1 if total_videos > 1 else None,
+                                            'status': 'failed'
+                                        })
+                                        total_failed += 1
+                                elif quota.violation:
+                                    quota_reason = quota.take_violation()
+                                    print(f"🚦 Stopped {video_title}: {quota_reason}")
+                                    if sync_state:
+                                        sync_state.defer(sync_key, link, entry)
+                                    download_info.append({
                                         'url': video_url,
                                         'title': video_title,
-                                        'duration': entry.get('duration', 0),
-                                        'file_path': actual_file,
-                                        'file_size': os.path.getsize(actual_file),
+                                        'reason': quota_reason,
                                         'playlist_index': video_idx + 1 if total_videos > 1 else None,
-                                        'status': 'success'
-                                    }
-                                    if enable_time_crop:
-                                        file_info.update({
-                                            'cropped': True,
-                                            'crop_start': start_time,
-                                            'crop_end': end_time,
-                                            'crop_duration': duration
-                                        })
-                                    download_info.append(file_info)
-                                    print(f"💾 Saved: {os.path.basename(actual_file)}")
-                                    total_successful += 1
+                                        'status': 'deferred' if sync_state else 'skipped_quota'
+                                    })
+                                    total_attempted -= 1
+                                    total_quota_skipped += 1
                                 else:
-                                    print(f"⚠️ Downloaded file not found for: {video_title}")
+                                    if sync_state:
+                                        sync_state.fail(sync_key, link, entry, 'Download failed')
                                     download_info.append({
                                         'url': video_url,
                                         'title': video_title,
-                                        'error': 'Downloaded file not found',
+                                        'error': 'Download failed',
                                         'playlist_index': video_idx + 1 if total_videos > 1 else None,
                                         'status': 'failed'
                                     })
                                     total_failed += 1
-                            else:
+                                    if not continue_on_error:
+                                        print("🛑 Stopping due to error (continue_on_error is disabled)")
+                                        break
+                            except Exception as video_error:
+                                error_msg = f"Error downloading video: {str(video_error)}"
+                                print(f"\n❌ {error_msg}")
+                                if sync_state:
+                                    sync_state.fail(sync_key, link, entry, error_msg)
                                 download_info.append({
                                     'url': video_url,
                                     'title': video_title,
-                                    'error': 'Download failed',
+                                    'error': error_msg,
                                     'playlist_index': video_idx + 1 if total_videos > 1 else None,
                                     'status': 'failed'
                                 })
@@ -676,35 +3021,38 @@ class YTDLDownloader:
                                 if not continue_on_error:
                                     print("🛑 Stopping due to error (continue_on_error is disabled)")
                                     break
-                        except Exception as video_error:
-                            error_msg = f"Error downloading video: {str(video_error)}"
-                            print(f"\n❌ {error_msg}")
-                            download_info.append({
-                                'url': video_url,
-                                'title': video_title,
-                                'error': error_msg,
-                                'playlist_index': video_idx + 1 if total_videos > 1 else None,
-                                'status': 'failed'
-                            })
-                            total_failed += 1
-                            if not continue_on_error:
-                                print("🛑 Stopping due to error (continue_on_error is disabled)")
-                                break
-                        if video_idx < total_videos - 1:
-                            import time
-                            time.sleep(1)
-            except Exception as link_error:
-                error_msg = f"Error processing {link}: {str(link_error)}"
-                print(f"\n❌ {error_msg}")
-                download_info.append({
-                    'url': link,
-                    'error': error_msg,
-                    'status': 'failed'
-                })
-                total_failed += 1
-                if not continue_on_error:
-                    print("🛑 Stopping due to error (continue_on_error is disabled)")
-                    break
+                            finally:
+                                if target_lock:
+                                    target_lock.release()
+                                if identity_pool:
+                                    finish_identity(False if success else None)
+                                active_timing['timings'] = None
+                                if detailed_timing:
+                                    metrics.record_video_timing(video_timing)
+                                    for record in download_info[records_before:]:
+                                        record['timing'] = video_timing
+                            if video_idx < total_videos - 1:
+                                with metrics.stage('sleep'):
+                                    time.sleep(1)
+                except Exception as link_error:
+                    error_msg = f"Error processing {link}: {str(link_error)}"
+                    print(f"\n❌ {error_msg}")
+                    download_info.append({
+                        'url': link,
+                        'error': error_msg,
+                        'status': 'failed'
+                    })
+                    total_failed += 1
+                    if not continue_on_error:
+                        print("🛑 Stopping due to error (continue_on_error is disabled)")
+                        break
+        finally:
+            if sync_state:
+                sync_state.save()
+            namer.cleanup()
+            for ydl in list(identity_ydls.values()) + list(section_ydls.values()):
+                ydl.close()
+        profile_summary = profiler.stop()
         print(f"\n{'='*60}")
         print(f"🎉 DOWNLOAD SUMMARY")
         print(f"{'='*60}")
@@ -718,8 +3066,14 @@ class YTDLDownloader:
             print(f"✂️ Time cropping applied to {total_successful} files")
         if total_failed > 0:
             print(f"⚠️ {total_failed} downloads failed (see details above)")
+        if total_segmented > 0:
+            print(f"✂️ Removed {total_removed_seconds:.0f}s of segments from {total_segmented} files")
+        if total_quota_skipped > 0:
+            print(f"🚦 {total_quota_skipped} entries were {'deferred' if sync_state else 'skipped'} by the quota")
         print(f"{'='*60}")
-        update_progress(total_steps, total_steps, f"Completed! Downloaded {total_successful}/{total_attempted} files")
+        update_progress(total_steps, total_steps, f"Completed! Downloaded {total_successful}/{total_attempted} files", force=True)
+        for record in download_info:
+            metrics.record_result(record.get('status', 'failed'))
         files_output = '\n'.join(downloaded_files) if downloaded_files else ""
         summary = {
             'summary': {
@@ -731,10 +3085,749 @@ class YTDLDownloader:
                 'media_type': media_type,
                 'format': audio_format if audio_only else video_format
             },
-            'downloads': download_info
+            'downloads': download_info,
+            'metrics': metrics.to_dict()
         }
+        if quota.enabled:
+            summary['summary']['quota'] = dict(quota.to_dict(), skipped=total_quota_skipped)
+        if identity_pool:
+            summary['summary']['identities'] = identity_pool.to_dict()
+        if segment_selection:
+            summary['summary']['segments'] = {
+                'categories': sorted(skip_categories) if segments else [],
+                'chapter_pattern': chapter_pattern.pattern if chapter_pattern else None,
+                'videos_cut': total_segmented,
+                'removed_seconds': round(total_removed_seconds, 3),
+            }
+        if sync_state:
+            summary['summary']['sync'] = {
+                'state_file': sync_state.path,
+                'sources_up_to_date': total_up_to_date,
+                'new_entries': total_successful,
+            }
+        if detailed_timing:
+            summary['timing'] = metrics.timing_summary()
+        if profile_summary:
+            summary['profile'] = profile_summary
+        if metrics_file and metrics_file.strip():
+            try:
+                metrics.write_prometheus(metrics_file.strip())
+                print(f"📈 Metrics written to: {metrics_file.strip()}")
+            except OSError as e:
+                print(f"⚠️ Could not write metrics file: {e}")
+        if result_mode == "compact":
+            import uuid
+            manifest_path = os.path.join(
+                abs_output_folder, f"ytdl_manifest_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.jsonl")
+            manifest_count = write_download_manifest(manifest_path, download_info)
+            print(f"📦 Manifest with {manifest_count} file(s) written to: {manifest_path}")
+            del summary['downloads']
+            summary['download_records'] = len(download_info)
+            summary['manifest'] = manifest_path
+            summary['metrics'] = {k: v for k, v in summary['metrics'].items() if k not in ('files', 'events')}
+            files_output = manifest_path if downloaded_files else ""
+            return (files_output, json.dumps(summary, separators=(',', ':')))
         info_output = json.dumps(summary, indent=2)
         return (files_output, info_output)
+METADATA_DEFAULT_FIELDS = "id,title,duration,uploader,channel,upload_date,view_count,webpage_url,thumbnail,extractor_key"
+FORMAT_SUMMARY_FIELDS = ('format_id', 'ext', 'width', 'height', 'fps', 'vcodec', 'acodec', 'abr', 'tbr',
+                         'asr', 'filesize', 'filesize_approx', 'protocol')
+def trim_info_dict(info: dict, fields: List[str]) -> dict:
+    trimmed = {}
+    for field in fields:
+        if field not in info or info[field] is None:
+            continue
+        value = info[field]
+        if field in ('formats', 'requested_formats'):
+            value = [{k: f.get(k) for k in FORMAT_SUMMARY_FIELDS if f.get(k) is not None} for f in value]
+        elif field in ('subtitles', 'automatic_captions'):
+            value = sorted(value.keys())
+        elif field == 'thumbnails':
+            value = [t.get('url') for t in value if t.get('url')][-3:]
+        elif field == 'chapters':
+            value = [{k: c.get(k) for k in ('start_time', 'end_time', 'title')} for c in value]
+        trimmed[field] = value
+    return trimmed
+class YTDLMetadata:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "links": ("YTDL_LINKS",),
+                "mode": (["flat", "full"], {
+                    "default": "flat",
+                    "tooltip": "⚡ flat: one request per link, playlist entries are listed without resolving them. full: every video is resolved (formats, chapters, captions)"
+                }),
+                "fields": ("STRING", {
+                    "default": METADATA_DEFAULT_FIELDS,
+                    "placeholder": "Comma-separated info_dict keys to keep (formats/subtitles/automatic_captions are summarised)"
+                }),
+                "max_workers": ("INT", {"default": 8, "min": 1, "max": 64, "step": 1}),
+                "max_entries": ("INT", {
+                    "default": 0, "min": 0, "max": 100000, "step": 1,
+                    "tooltip": "📋 Maximum entries listed per playlist (0 = no limit)"
+                }),
+                "output_format": (["json", "jsonl"], {"default": "jsonl"}),
+            },
+            "optional": {
+                "browser_for_cookies": (["none", "chrome", "firefox", "edge", "safari", "brave"], {"default": "none"}),
+                "cookie_file": ("STRING", {
+                    "default": "",
+                    "placeholder": "Path to cookies.txt file (optional)"
+                }),
+            }
+        }
+    RETURN_TYPES = ("STRING", "YTDL_LINKS", "INT")
+    RETURN_NAMES = ("metadata", "links", "count")
+    FUNCTION = "fetch_metadata"
+    CATEGORY = "audio/ytdl"
+    def fetch_metadata(self, links: List[str], mode: str, fields: str, max_workers: int,
+                       max_entries: int, output_format: str, browser_for_cookies: str = "none",
+                       cookie_file: str = ""):
+        import itertools
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        yt_dlp = ensure_yt_dlp()
+        field_list = [f.strip() for f in fields.split(',') if f.strip()] or METADATA_DEFAULT_FIELDS.split(',')
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'extract_flat': 'in_playlist',
+            'socket_timeout': 30,
+            'extractor_retries': 3,
+        }
+        if cookie_file and os.path.exists(cookie_file):
+            ydl_opts['cookiefile'] = cookie_file
+        elif browser_for_cookies != "none":
+            ydl_opts['cookiesfrombrowser'] = (browser_for_cookies,)
+        downloader = YTDLDownloader()
+        local = threading.local()
+        instances = []
+        instances_lock = threading.Lock()
+        def get_ydl():
+            if not hasattr(local, 'ydl'):
+                local.ydl = yt_dlp.YoutubeDL(ydl_opts)
+                with instances_lock:
+                    instances.append(local.ydl)
+            return local.ydl
+        def resolve_link(url):
+            try:
+                ydl = get_ydl()
+                info = downloader.safe_extract_info(ydl, url, download=False, process=False)
+                info = downloader.resolve_link_info(ydl, info)
+            except Exception as e:
+                return [{'url': url, 'error': str(e)}]
+            if not info:
+                return [{'url': url, 'error': 'Failed to extract information'}]
+            if info.get('_type') not in ('playlist', 'multi_video'):
+                record = trim_info_dict(info, field_list)
+                record.setdefault('webpage_url', info.get('webpage_url') or url)
+                return [record]
+            entries = info.get('entries') or []
+            if max_entries:
+                entries = itertools.islice(entries, max_entries)
+            playlist_meta = {'playlist_id': info.get('id'), 'playlist_title': info.get('title')}
+            records = []
+            for position, entry in enumerate(entries, start=1):
+                if entry is None:
+                    continue
+                record = trim_info_dict(entry, field_list)
+                record.setdefault('webpage_url', entry.get('url'))
+                record.update(playlist_meta, playlist_index=position)
+                records.append(record)
+            return records
+        def resolve_entry(record):
+            if 'error' in record or not record.get('webpage_url') or 'playlist_id' not in record:
+                return record
+            try:
+                info = downloader.safe_extract_info(get_ydl(), record['webpage_url'], download=False)
+            except Exception as e:
+                return dict(record, error=str(e))
+            if not info:
+                return dict(record, error='Failed to extract information')
+            full = trim_info_dict(info, field_list)
+            full.setdefault('webpage_url', info.get('webpage_url') or record['webpage_url'])
+            full.update({k: record[k] for k in ('playlist_id', 'playlist_title', 'playlist_index')})
+            return full
+        print(f"🔎 Fetching {mode} metadata for {len(links)} link(s) with {max_workers} worker(s)")
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                records = [record for batch in executor.map(resolve_link, links) for record in batch]
+                if mode == "full":
+                    records = list(executor.map(resolve_entry, records))
+        finally:
+            for ydl in instances:
+                ydl.close()
+        failed = sum(1 for record in records if 'error' in record)
+        print(f"✅ Metadata ready: {len(records) - failed} item(s), {failed} failed")
+        resolved_links = [record['webpage_url'] for record in records
+                          if 'error' not in record and record.get('webpage_url')]
+        if output_format == "jsonl":
+            output = '\n'.join(json.dumps(record, separators=(',', ':')) for record in records)
+        else:
+            output = json.dumps(records, separators=(',', ':'))
+        return (output, resolved_links, len(records))
+def rank_thumbnails(info: dict) -> List[dict]:
+    thumbnails = [t for t in (info.get('thumbnails') or []) if t.get('url')]
+    if not thumbnails:
+        return [{'id': 'default', 'url': info['thumbnail']}] if info.get('thumbnail') else []
+    ranked = sorted(enumerate(thumbnails), reverse=True,
+                    key=lambda item: (item[1].get('preference') or 0,
+                                      (item[1].get('width') or 0) * (item[1].get('height') or 0),
+                                      not item[1]['url'].split('?')[0].endswith('.webp'),
+                                      item[0]))
+    return [thumbnail for _, thumbnail in ranked]
+def pick_storyboard_format(info: dict) -> Optional[dict]:
+    storyboards = [f for f in (info.get('formats') or [])
+                   if f.get('format_note') == 'storyboard' and f.get('fragments') and f.get('rows') and f.get('columns')]
+    if not storyboards:
+        return None
+    return max(storyboards, key=lambda f: (f.get('width') or 0) * (f.get('height') or 0))
+def storyboard_tiles(fmt: dict, max_frames: int = 0) -> List[Tuple[int, int, float]]:
+    per_sheet = fmt['rows'] * fmt['columns']
+    fps = fmt.get('fps') or 0
+    tiles = []
+    offset = 0.0
+    for fragment_index, fragment in enumerate(fmt['fragments']):
+        duration = fragment.get('duration') or 0
+        count = min(per_sheet, max(1, round(duration * fps))) if fps and duration else per_sheet
+        for tile_index in range(count):
+            tiles.append((fragment_index, tile_index, round(offset + (tile_index / fps if fps else 0), 3)))
+        offset += duration
+    if max_frames and len(tiles) > max_frames:
+        step = len(tiles) / max_frames
+        tiles = [tiles[int(i * step)] for i in range(max_frames)]
+    return tiles
+class YTDLThumbnails:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "links": ("YTDL_LINKS",),
+                "source": (["thumbnail", "storyboard", "both"], {
+                    "default": "thumbnail",
+                    "tooltip": "🖼️ thumbnail: one image per video from a flat listing. storyboard: sprite-sheet frames (YouTube), requires resolving every video"
+                }),
+                "width": ("INT", {"default": 320, "min": 16, "max": 4096, "step": 8}),
+                "height": ("INT", {"default": 180, "min": 16, "max": 4096, "step": 8}),
+                "storyboard_frames": ("INT", {
+                    "default": 8, "min": 0, "max": 1000, "step": 1,
+                    "tooltip": "🎞️ Frames sampled evenly from each storyboard (0 = all tiles)"
+                }),
+                "max_workers": ("INT", {"default": 8, "min": 1, "max": 64, "step": 1}),
+                "max_entries": ("INT", {
+                    "default": 0, "min": 0, "max": 100000, "step": 1,
+                    "tooltip": "📋 Maximum entries listed per playlist (0 = no limit)"
+                }),
+            },
+            "optional": {
+                "cache_folder": ("STRING", {
+                    "default": "output/YTDL/.thumbnail_cache",
+                    "placeholder": "Folder for cached images (empty = no cache)"
+                }),
+                "browser_for_cookies": (["none", "chrome", "firefox", "edge", "safari", "brave"], {"default": "none"}),
+                "cookie_file": ("STRING", {
+                    "default": "",
+                    "placeholder": "Path to cookies.txt file (optional)"
+                }),
+            }
+        }
+    RETURN_TYPES = ("IMAGE", "STRING", "INT")
+    RETURN_NAMES = ("images", "frame_info", "count")
+    FUNCTION = "fetch_thumbnails"
+    CATEGORY = "audio/ytdl"
+    def fetch_thumbnails(self, links: List[str], source: str, width: int, height: int,
+                         storyboard_frames: int, max_workers: int, max_entries: int,
+                         cache_folder: str = "output/YTDL/.thumbnail_cache",
+                         browser_for_cookies: str = "none", cookie_file: str = ""):
+        import io
+        import itertools
+        import threading
+        import hashlib
+        import numpy as np
+        import torch
+        from PIL import Image
+        from concurrent.futures import ThreadPoolExecutor
+        yt_dlp = ensure_yt_dlp()
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'extract_flat': 'in_playlist',
+            'socket_timeout': 30,
+            'extractor_retries': 3,
+        }
+        if cookie_file and os.path.exists(cookie_file):
+            ydl_opts['cookiefile'] = cookie_file
+        elif browser_for_cookies != "none":
+            ydl_opts['cookiesfrombrowser'] = (browser_for_cookies,)
+        if cache_folder and cache_folder.strip():
+            cache_folder = cache_folder.strip().rstrip('/\\')
+            if not os.path.isabs(cache_folder):
+                cache_folder = os.path.join(os.getcwd(), cache_folder)
+            os.makedirs(cache_folder, exist_ok=True)
+        else:
+            cache_folder = None
+        downloader = YTDLDownloader()
+        local = threading.local()
+        instances = []
+        instances_lock = threading.Lock()
+        stats = {'fetched': 0, 'cached': 0, 'failed': 0}
+        stats_lock = threading.Lock()
+        def get_ydl():
+            if not hasattr(local, 'ydl'):
+                local.ydl = yt_dlp.YoutubeDL(ydl_opts)
+                with instances_lock:
+                    instances.append(local.ydl)
+            return local.ydl
+        def fetch_image(url, cache_key):
+            cache_path = None
+            if cache_folder:
+                name = hashlib.sha1(cache_key.encode('utf-8')).hexdigest()
+                cache_path = os.path.join(cache_folder, name[:2], name)
+                if os.path.exists(cache_path):
+                    with open(cache_path, 'rb') as f:
+                        data = f.read()
+                    with stats_lock:
+                        stats['cached'] += 1
+                    return Image.open(io.BytesIO(data)).convert('RGB')
+            try:
+                data = get_ydl().urlopen(url).read()
+                image = Image.open(io.BytesIO(data)).convert('RGB')
+            except Exception as e:
+                print(f"⚠️ Image fetch failed ({cache_key}): {e}")
+                with stats_lock:
+                    stats['failed'] += 1
+                return None
+            if cache_path:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, cache_path)
+            with stats_lock:
+                stats['fetched'] += 1
+            return image
+        def to_array(image):
+            image = image.resize((width, height), Image.BILINEAR)
+            return np.asarray(image, dtype=np.float32) / 255.0
+        def list_videos(url):
+            try:
+                ydl = get_ydl()
+                info = downloader.safe_extract_info(ydl, url, download=False, process=False)
+                info = downloader.resolve_link_info(ydl, info)
+            except Exception as e:
+                print(f"⚠️ Failed to list {url}: {e}")
+                return []
+            if not info:
+                return []
+            if info.get('_type') not in ('playlist', 'multi_video'):
+                return [info]
+            entries = (entry for entry in (info.get('entries') or []) if entry is not None)
+            if max_entries:
+                entries = itertools.islice(entries, max_entries)
+            return list(entries)
+        def video_frames(info):
+            video_id = info.get('id') or info.get('url') or info.get('webpage_url')
+            video_url = info.get('webpage_url') or info.get('url')
+            title = info.get('title')
+            needs_full = source != "thumbnail" and not info.get('formats')
+            if needs_full or (source != "storyboard" and not rank_thumbnails(info)):
+                try:
+                    info = downloader.safe_extract_info(get_ydl(), video_url, download=False) or info
+                except Exception as e:
+                    print(f"⚠️ Failed to resolve {video_url}: {e}")
+            frames = []
+            if source in ("thumbnail", "both"):
+                for thumbnail in rank_thumbnails(info):
+                    image = fetch_image(thumbnail['url'], f"{info.get('extractor_key') or ''}:{video_id}:thumb:{thumbnail.get('id')}")
+                    if image is not None:
+                        frames.append((to_array(image), {'url': video_url, 'title': title, 'kind': 'thumbnail'}))
+                        break
+            if source in ("storyboard", "both"):
+                fmt = pick_storyboard_format(info)
+                if fmt is None:
+                    print(f"⚠️ No storyboard available for {title or video_url}")
+                else:
+                    tile_width, tile_height = fmt.get('width'), fmt.get('height')
+                    sheets = {}
+                    for fragment_index, tile_index, timestamp in storyboard_tiles(fmt, storyboard_frames):
+                        if fragment_index not in sheets:
+                            fragment = fmt['fragments'][fragment_index]
+                            sheets[fragment_index] = fetch_image(
+                                fragment.get('url') or f"{fmt.get('fragment_base_url', '')}{fragment.get('path', '')}",
+                                f"{info.get('extractor_key') or ''}:{video_id}:{fmt.get('format_id')}:{fragment_index}")
+                        sheet = sheets[fragment_index]
+                        if sheet is None:
+                            continue
+                        tw = tile_width or sheet.width // fmt['columns']
+                        th = tile_height or sheet.height // fmt['rows']
+                        row, column = divmod(tile_index, fmt['columns'])
+                        tile = sheet.crop((column * tw, row * th, (column + 1) * tw, (row + 1) * th))
+                        frames.append((to_array(tile), {'url': video_url, 'title': title, 'kind': 'storyboard',
+                                                        'timestamp': timestamp}))
+            return frames
+        print(f"🖼️ Fetching {source} images for {len(links)} link(s) with {max_workers} worker(s)")
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                videos = [video for batch in executor.map(list_videos, links) for video in batch]
+                results = [frame for batch in executor.map(video_frames, videos) for frame in batch]
+        finally:
+            for ydl in instances:
+                ydl.close()
+        print(f"✅ {len(results)} image(s) from {len(videos)} video(s): {stats['fetched']} fetched, "
+              f"{stats['cached']} cached, {stats['failed']} failed")
+        if results:
+            images = torch.from_numpy(np.stack([array for array, _ in results]))
+        else:
+            images = torch.zeros((1, height, width, 3), dtype=torch.float32)
+        frame_info = {
+            'summary': dict(stats, videos=len(videos), images=len(results), source=source),
+            'frames': [dict(meta, index=i) for i, (_, meta) in enumerate(results)],
+        }
+        return (images, json.dumps(frame_info, indent=2), len(results))
+class YTDLStreamAudio:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "links": ("YTDL_LINKS",),
+                "link_index": ("INT", {"default": 0, "min": 0, "max": 99999, "step": 1}),
+                "audio_format": ("STRING", {
+                    "default": "bestaudio/best",
+                    "placeholder": "yt-dlp format selector"
+                }),
+                "sample_rate": ("INT", {"default": 44100, "min": 8000, "max": 192000, "step": 100}),
+                "channels": ("INT", {"default": 2, "min": 1, "max": 8, "step": 1}),
+                "max_duration": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 86400.0, "step": 1.0,
+                    "tooltip": "⏱️ Stop decoding after this many seconds (0 = whole stream)"
+                }),
+                "dtype": (list(AUDIO_DTYPES), {"default": "float32"}),
+            },
+            "optional": {
+                "cache_folder": ("STRING", {
+                    "default": "",
+                    "placeholder": "Folder for decoded PCM (.npy) cache (empty = no cache)"
+                }),
+                "browser_for_cookies": (["none", "chrome", "firefox", "edge", "safari", "brave"], {"default": "none"}),
+                "cookie_file": ("STRING", {
+                    "default": "",
+                    "placeholder": "Path to cookies.txt file (optional)"
+                }),
+            }
+        }
+    RETURN_TYPES = ("AUDIO", "STRING")
+    RETURN_NAMES = ("audio", "stream_info")
+    FUNCTION = "stream_audio"
+    CATEGORY = "audio/ytdl"
+    def stream_audio(self, links: List[str], link_index: int, audio_format: str, sample_rate: int,
+                     channels: int, max_duration: float, dtype: str, cache_folder: str = "",
+                     browser_for_cookies: str = "none", cookie_file: str = ""):
+        import time
+        import tempfile
+        import numpy as np
+        import torch
+        yt_dlp = ensure_yt_dlp()
+        if not links:
+            raise ValueError("No links provided")
+        if not check_ffmpeg():
+            raise RuntimeError("Streaming ingest requires ffmpeg")
+        url = links[min(link_index, len(links) - 1)]
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'format': audio_format or 'bestaudio/best',
+            'socket_timeout': 30,
+            'extractor_retries': 3,
+        }
+        cookie_args = []
+        if cookie_file and os.path.exists(cookie_file):
+            ydl_opts['cookiefile'] = cookie_file
+            cookie_args = ['--cookies', cookie_file]
+        elif browser_for_cookies != "none":
+            ydl_opts['cookiesfrombrowser'] = (browser_for_cookies,)
+            cookie_args = ['--cookies-from-browser', browser_for_cookies]
+        started = time.perf_counter()
+        resolver = YTDLDownloader()
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = resolver.resolve_link_info(
+                ydl, resolver.safe_extract_info(ydl, url, download=False, process=False))
+            if not info:
+                raise RuntimeError(f"Could not extract information for {url}")
+            if info.get('_type') in ('playlist', 'multi_video'):
+                entry = next((entry for entry in info.get('entries') or [] if entry), None)
+                info = resolver.resolve_link_info(ydl, entry) if entry else None
+                if not info:
+                    raise RuntimeError(f"No playable entries in {url}")
+            clean_info = ydl.sanitize_info(info)
+        extract_seconds = time.perf_counter() - started
+        stream_info = {
+            'url': info.get('webpage_url') or url,
+            'title': info.get('title'),
+            'id': info.get('id'),
+            'format_id': info.get('format_id'),
+            'sample_rate': sample_rate,
+            'channels': channels,
+            'extract_seconds': round(extract_seconds, 3),
+        }
+        cache_path = None
+        if cache_folder and cache_folder.strip():
+            cache_folder = cache_folder.strip().rstrip('/\\')
+            if not os.path.isabs(cache_folder):
+                cache_folder = os.path.join(os.getcwd(), cache_folder)
+            os.makedirs(cache_folder, exist_ok=True)
+            cache_id = re.sub(r'[^\w.-]', '_', f"{info.get('extractor_key') or 'media'}_{info.get('id')}")
+            cache_path = os.path.join(
+                cache_folder, f"{cache_id}_{info.get('format_id')}_{sample_rate}hz_{channels}ch_{max_duration:g}s.npy")
+            if os.path.exists(cache_path):
+                samples = np.load(cache_path)
+                waveform, _ = conform_waveform(torch.from_numpy(samples), sample_rate, dtype=dtype)
+                print(f"📦 Loaded cached PCM for {info.get('title')}: {cache_path}")
+                stream_info.update(cached=True, duration_seconds=round(samples.shape[-1] / sample_rate, 3))
+                return ({"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}, json.dumps(stream_info, indent=2))
+        with tempfile.NamedTemporaryFile('w', suffix='.info.json', delete=False, encoding='utf-8') as f:
+            json.dump(clean_info, f)
+            info_json = f.name
+        downloader_cmd = [sys.executable, '-m', 'yt_dlp', '--quiet', '--no-warnings', '--no-part',
+                          '--load-info-json', info_json, '-f', audio_format or 'bestaudio/best', '-o', '-'] + cookie_args
+        decoder_cmd = ['ffmpeg', '-v', 'error', '-i', 'pipe:0', '-vn']
+        if max_duration:
+            decoder_cmd += ['-t', str(max_duration)]
+        decoder_cmd += ['-f', 'f32le', '-acodec', 'pcm_f32le', '-ar', str(sample_rate), '-ac', str(channels), 'pipe:1']
+        expected_seconds = max_duration or info.get('duration') or 0
+        progress_bar = None
+        if expected_seconds:
+            try:
+                import comfy.utils
+                progress_bar = comfy.utils.ProgressBar(int(expected_seconds))
+            except Exception:
+                progress_bar = None
+        print(f"🌊 Streaming {info.get('title')} ({info.get('format_id')}) at {sample_rate} Hz, {channels} ch")
+        chunk_bytes = sample_rate * channels * 4
+        chunks = []
+        received = 0
+        first_chunk_seconds = None
+        downloader_log = tempfile.TemporaryFile()
+        decoder_log = tempfile.TemporaryFile()
+        downloader = subprocess.Popen(downloader_cmd, stdout=subprocess.PIPE, stderr=downloader_log)
+        decoder = subprocess.Popen(decoder_cmd, stdin=downloader.stdout, stdout=subprocess.PIPE, stderr=decoder_log)
+        downloader.stdout.close()
+        try:
+            while True:
+                chunk = decoder.stdout.read(chunk_bytes)
+                if not chunk:
+                    break
+                if first_chunk_seconds is None:
+                    first_chunk_seconds = time.perf_counter() - started
+                chunks.append(chunk)
+                received += len(chunk)
+                if progress_bar is not None:
+                    progress_bar.update_absolute(min(int(received / chunk_bytes), int(expected_seconds)))
+            decoder.wait()
+        finally:
+            for process in (decoder, downloader):
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+            decoder.stdout.close()
+            os.remove(info_json)
+            errors = []
+            for log in (decoder_log, downloader_log):
+                log.seek(0)
+                errors.append(log.read().decode('utf-8', 'replace').strip())
+                log.close()
+        if decoder.returncode != 0 or not received:
+            error = errors[0] or errors[1]
+            raise RuntimeError(f"Streaming decode failed: {error or 'no audio received'}")
+        pcm = b''.join(chunks)
+        usable = len(pcm) - len(pcm) % (channels * 4)
+        samples = np.frombuffer(pcm[:usable], dtype=np.float32).reshape(-1, channels).T.copy()
+        if cache_path:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, samples)
+            os.replace(tmp_path, cache_path)
+        waveform, _ = conform_waveform(torch.from_numpy(samples), sample_rate, dtype=dtype)
+        total_seconds = time.perf_counter() - started
+        stream_info.update({
+            'cached': False,
+            'duration_seconds': round(samples.shape[-1] / sample_rate, 3),
+            'first_chunk_seconds': round(first_chunk_seconds or 0.0, 3),
+            'total_seconds': round(total_seconds, 3),
+        })
+        print(f"✅ Streamed {stream_info['duration_seconds']}s of audio in {total_seconds:.1f}s "
+              f"(first chunk after {stream_info['first_chunk_seconds']}s)")
+        return ({"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}, json.dumps(stream_info, indent=2))
+def split_into_buckets(items: list, bucket_count: int) -> List[list]:
+    bucket_count = max(1, min(bucket_count, len(items)))
+    size, extra = divmod(len(items), bucket_count)
+    buckets, start = [], 0
+    for i in range(bucket_count):
+        end = start + size + (1 if i < extra else 0)
+        buckets.append(items[start:end])
+        start = end
+    return buckets
+class YTDLBatchAudio:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "downloaded_files": ("STRING", {"forceInput": True}),
+                "target_sample_rate": ("INT", {"default": 44100, "min": 8000, "max": 192000, "step": 100}),
+                "target_channels": ("INT", {"default": 2, "min": 1, "max": 8, "step": 1}),
+                "dtype": (list(AUDIO_DTYPES), {"default": "float32"}),
+                "max_workers": ("INT", {"default": 8, "min": 1, "max": 64, "step": 1}),
+                "max_length_seconds": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 86400.0, "step": 1.0,
+                    "tooltip": "✂️ Truncate every file to this length (0 = no cap)"
+                }),
+                "bucket_count": ("INT", {
+                    "default": 1, "min": 1, "max": 256, "step": 1,
+                    "tooltip": "🪣 Split files, sorted by length, into this many batches so short clips are not padded to the longest one"
+                }),
+                "chunk_seconds": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 3600.0, "step": 0.5,
+                    "tooltip": "🧩 Cut every file into fixed windows of this length and return one batch of windows (0 = off)"
+                }),
+            }
+        }
+    RETURN_TYPES = ("AUDIO", "MASK", "STRING")
+    RETURN_NAMES = ("audio_batches", "padding_masks", "batch_info")
+    OUTPUT_IS_LIST = (True, True, False)
+    FUNCTION = "load_batch"
+    CATEGORY = "audio/ytdl"
+    def load_batch(self, downloaded_files: str, target_sample_rate: int, target_channels: int, dtype: str,
+                   max_workers: int, max_length_seconds: float, bucket_count: int, chunk_seconds: float):
+        import time
+        import torch
+        from concurrent.futures import ThreadPoolExecutor
+        file_paths = load_file_list(downloaded_files) if downloaded_files and downloaded_files.strip() else []
+        paths = list(file_paths)
+        torch_dtype = getattr(torch, dtype)
+        if not paths:
+            print("⚠️ No downloaded files available")
+            return ([{"waveform": torch.zeros((1, target_channels, 1024), dtype=torch_dtype), "sample_rate": target_sample_rate}],
+                    [torch.zeros((1, 1024))], json.dumps({"error": "No files available", "total_files": 0}))
+        max_samples = int(max_length_seconds * target_sample_rate) or None
+        def decode(path):
+            try:
+                audio = load_audio_waveform(path, target_sample_rate, target_channels, dtype)
+                return audio["waveform"][0, :, :max_samples], None
+            except Exception as e:
+                return None, str(e)
+        started = time.perf_counter()
+        print(f"🎧 Decoding {len(paths)} file(s) with {max_workers} worker(s) at {target_sample_rate} Hz, {target_channels} ch")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            decoded = list(executor.map(decode, paths))
+        decode_seconds = time.perf_counter() - started
+        failed = [{"index": i, "path": path, "error": error}
+                  for i, (path, (waveform, error)) in enumerate(zip(paths, decoded)) if waveform is None]
+        for item in failed:
+            print(f"⚠️ Skipping {os.path.basename(item['path'])}: {item['error']}")
+        segments = [(i, 0, waveform) for i, (waveform, _) in enumerate(decoded) if waveform is not None]
+        window = int(chunk_seconds * target_sample_rate)
+        if window:
+            segments = [(i, start, waveform[:, start:start + window])
+                        for i, _, waveform in segments for start in range(0, max(waveform.shape[-1], 1), window)]
+            groups = [segments]
+        else:
+            segments.sort(key=lambda segment: segment[2].shape[-1])
+            groups = split_into_buckets(segments, bucket_count)
+        batches, masks, batch_info = [], [], []
+        for group in groups:
+            if not group:
+                continue
+            length = window or max(waveform.shape[-1] for _, _, waveform in group) or 1
+            batch = torch.zeros((len(group), target_channels, length), dtype=torch_dtype)
+            mask = torch.zeros((len(group), length))
+            for row, (_, _, waveform) in enumerate(group):
+                batch[row, :, :waveform.shape[-1]] = waveform
+                mask[row, :waveform.shape[-1]] = 1.0
+            batches.append({"waveform": batch, "sample_rate": target_sample_rate})
+            masks.append(mask)
+            valid = float(mask.sum())
+            batch_info.append({
+                "batch_size": len(group),
+                "length_seconds": round(length / target_sample_rate, 3),
+                "padding_ratio": round(1.0 - valid / mask.numel(), 4),
+                "items": [{"file_index": i, "name": os.path.basename(paths[i]),
+                           "offset_seconds": round(start / target_sample_rate, 3),
+                           "seconds": round(waveform.shape[-1] / target_sample_rate, 3)}
+                          for i, start, waveform in group],
+            })
+        if not batches:
+            batches = [{"waveform": torch.zeros((1, target_channels, 1024), dtype=torch_dtype), "sample_rate": target_sample_rate}]
+            masks = [torch.zeros((1, 1024))]
+        print(f"✅ {len(paths) - len(failed)}/{len(paths)} file(s) decoded in {decode_seconds:.1f}s into "
+              f"{len(batch_info)} batch(es) of {', '.join(str(info['batch_size']) for info in batch_info) or '0'}")
+        info = {
+            "total_files": len(paths),
+            "decoded": len(paths) - len(failed),
+            "failed": failed,
+            "sample_rate": target_sample_rate,
+            "channels": target_channels,
+            "mode": "chunk" if window else "bucket",
+            "decode_seconds": round(decode_seconds, 3),
+            "batches": batch_info,
+        }
+        return (batches, masks, json.dumps(info, indent=2))
+class YTDLLibrary:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "library_folder": ("STRING", {
+                    "default": "output/YTDL/",
+                    "placeholder": "Folder to index (relative to ComfyUI root)"
+                }),
+                "refresh": (["incremental", "full", "none"], {
+                    "default": "incremental",
+                    "tooltip": "🔄 incremental: re-probe only files whose size/mtime changed (skipped entirely when no folder changed). full: re-probe everything. none: query the existing index."
+                }),
+                "media_type": (["all", "audio", "video"], {"default": "all"}),
+                "search": ("STRING", {"default": "", "placeholder": "Match title, path or source URL"}),
+                "min_duration": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 86400.0, "step": 1.0}),
+                "max_duration": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 86400.0, "step": 1.0,
+                                           "tooltip": "0 = no limit"}),
+                "sort_by": (list(MediaLibrary.SORT_COLUMNS), {"default": "mtime"}),
+                "descending": ("BOOLEAN", {"default": True}),
+                "limit": ("INT", {"default": 100, "min": 0, "max": 100000, "step": 1, "tooltip": "0 = no limit"}),
+            }
+        }
+    RETURN_TYPES = ("STRING", "STRING", "INT")
+    RETURN_NAMES = ("downloaded_files", "library_info", "count")
+    FUNCTION = "query_library"
+    CATEGORY = "audio/ytdl"
+    def query_library(self, library_folder: str, refresh: str, media_type: str, search: str,
+                      min_duration: float, max_duration: float, sort_by: str, descending: bool, limit: int):
+        import time
+        if not library_folder or not library_folder.strip():
+            library_folder = "output/YTDL/"
+        library_folder = library_folder.strip().rstrip('/\\')
+        if not os.path.isabs(library_folder):
+            library_folder = os.path.join(os.getcwd(), library_folder)
+        library = MediaLibrary(library_folder)
+        started = time.perf_counter()
+        scan_stats = {}
+        if refresh != "none":
+            scan_stats = library.refresh(full_rescan=refresh == "full")
+            if not scan_stats['skipped_scan']:
+                print(f"📚 Library scan: {scan_stats['scanned']} files, {scan_stats['added']} added, "
+                      f"{scan_stats['updated']} updated, {scan_stats['removed']} removed")
+        rows = library.query(media_type, search, min_duration, max_duration, sort_by, descending, limit)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"📚 {len(rows)} library item(s) matched in {elapsed_ms} ms")
+        info = {
+            'library': library.db_path,
+            'count': len(rows),
+            'elapsed_ms': elapsed_ms,
+            'scan': scan_stats,
+            'items': [{k: row[k] for k in ('path', 'title', 'media_type', 'duration', 'size', 'source_url')}
+                      for row in rows[:200]],
+        }
+        return ('\n'.join(row['path'] for row in rows), json.dumps(info, indent=2), len(rows))
 class YTDLPreviewAudio:
     @classmethod
     def INPUT_TYPES(cls):
@@ -748,6 +3841,17 @@ class YTDLPreviewAudio:
                     "step": 1,
                     "display": "number"
                 }),
+            },
+            "optional": {
+                "target_sample_rate": ("INT", {
+                    "default": 0, "min": 0, "max": 192000, "step": 100,
+                    "tooltip": "🎚️ Resample while loading (0 = keep the file's rate)"
+                }),
+                "target_channels": ("INT", {
+                    "default": 0, "min": 0, "max": 8, "step": 1,
+                    "tooltip": "🔈 Mix to this many channels while loading (0 = keep, 1 = mono)"
+                }),
+                "dtype": (list(AUDIO_DTYPES), {"default": "float32"}),
             }
         }
     RETURN_TYPES = ("AUDIO", "STRING", "STRING", "INT")
@@ -755,13 +3859,14 @@ class YTDLPreviewAudio:
     FUNCTION = "prepare_audio_preview"
     CATEGORY = "audio/ytdl"
     OUTPUT_NODE = True
-    def prepare_audio_preview(self, downloaded_files: str, file_index: int = 0):
+    def prepare_audio_preview(self, downloaded_files: str, file_index: int = 0, target_sample_rate: int = 0,
+                              target_channels: int = 0, dtype: str = "float32"):
         import json
         if not downloaded_files or downloaded_files.strip() == "":
             print("⚠️ No downloaded files available")
             empty_info = {"error": "No files available", "total_files": 0}
             return (None, "", json.dumps(empty_info), 0)
-        file_paths = [path.strip() for path in downloaded_files.split('\n') if path.strip()]
+        file_paths = load_file_list(downloaded_files)
         if not file_paths:
             print("⚠️ No valid file paths found")
             empty_info = {"error": "No valid file paths", "total_files": 0}
@@ -774,27 +3879,12 @@ class YTDLPreviewAudio:
             print(f"❌ File not found: {current_file}")
             return (None, "", json.dumps(error_info), len(file_paths))
         try:
-            import torch
-            import torchaudio
-            waveform, sample_rate = torchaudio.load(current_file)
-            audio_data = {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
+            audio_data = load_audio_waveform(current_file, target_sample_rate, target_channels, dtype)
+            waveform, sample_rate = audio_data["waveform"][0], audio_data["sample_rate"]
         except Exception as e:
-            print(f"❌ Could not load audio file: {e}")
-            try:
-                import tempfile
-                temp_wav = tempfile.mktemp(suffix='.wav')
-                subprocess.run([
-                    'ffmpeg', '-i', current_file, '-ar', '44100', '-ac', '2',
-                    '-y', temp_wav
-                ], capture_output=True, check=True)
-                waveform, sample_rate = torchaudio.load(temp_wav)
-                audio_data = {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
-                os.unlink(temp_wav)
-                print("✅ Audio converted successfully with ffmpeg")
-            except Exception as e2:
-                print(f"❌ Audio conversion also failed: {e2}")
-                error_info = {"error": f"Could not load audio: {str(e)}", "total_files": len(file_paths)}
-                return (None, "", json.dumps(error_info), len(file_paths))
+            print(f"❌ Audio conversion also failed: {e}")
+            error_info = {"error": f"Could not load audio: {str(e)}", "total_files": len(file_paths)}
+            return (None, "", json.dumps(error_info), len(file_paths))
         file_size = os.path.getsize(current_file)
         file_name = os.path.basename(current_file)
         try:
@@ -810,7 +3900,7 @@ class YTDLPreviewAudio:
             "channels": waveform.shape[0],
             "current_index": file_index,
             "total_files": len(file_paths),
-            "all_files": [os.path.basename(f) for f in file_paths]
+            "all_files": [os.path.basename(f) for f in file_paths] if isinstance(file_paths, list) else []
         }
         self.create_audio_player_display(current_file, file_info)
         return (audio_data, current_file, json.dumps(file_info, indent=2), len(file_paths))
@@ -853,7 +3943,21 @@ class YTDLPreview:
                     "display": "number"
                 }),
             },
-            "optional": {}
+            "optional": {
+                "target_sample_rate": ("INT", {
+                    "default": 0, "min": 0, "max": 192000, "step": 100,
+                    "tooltip": "🎚️ Resample while loading (0 = keep the file's rate)"
+                }),
+                "target_channels": ("INT", {
+                    "default": 0, "min": 0, "max": 8, "step": 1,
+                    "tooltip": "🔈 Mix to this many channels while loading (0 = keep, 1 = mono)"
+                }),
+                "dtype": (list(AUDIO_DTYPES), {"default": "float32"}),
+                "decode_audio": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "🎧 Decode the file into the AUDIO output. Turn off to only play it in the node (streamed with range requests)"
+                }),
+            }
         }
     RETURN_TYPES = ("AUDIO", "STRING", "STRING", "INT")
     RETURN_NAMES = ("audio", "current_file_path", "media_info_json", "total_files_count")
@@ -871,38 +3975,20 @@ class YTDLPreview:
                 elif mime_type.startswith('video/'):
                     return 'video'
             ext = os.path.splitext(file_path)[1].lower()
-            audio_exts = ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.wma']
-            video_exts = ['.mp4', '.webm', '.mkv', '.avi', '.mov', '.m4v', '.flv']
-            if ext in audio_exts:
+            if ext in AUDIO_EXTENSIONS:
                 return 'audio'
-            elif ext in video_exts:
+            elif ext in VIDEO_EXTENSIONS:
                 return 'video'
             return 'unknown'
         except:
             return 'unknown'
-    def load_audio_data(self, file_path):
+    def load_audio_data(self, file_path, target_sample_rate=0, target_channels=0, dtype='float32'):
         
         try:
-            import torch
-            import torchaudio
-            waveform, sample_rate = torchaudio.load(file_path)
-            return {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
+            return load_audio_waveform(file_path, target_sample_rate, target_channels, dtype)
         except Exception as e:
-            print(f"⚠️ Direct audio load failed: {e}")
-            try:
-                import tempfile
-                temp_wav = tempfile.mktemp(suffix='.wav')
-                subprocess.run([
-                    'ffmpeg', '-i', file_path, '-ar', '44100', '-ac', '2',
-                    '-y', temp_wav
-                ], capture_output=True, check=True)
-                waveform, sample_rate = torchaudio.load(temp_wav)
-                os.unlink(temp_wav)
-                print("✅ Audio converted successfully with ffmpeg")
-                return {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
-            except Exception as e2:
-                print(f"❌ Audio fallback also failed: {e2}")
-                return None
+            print(f"❌ Audio fallback also failed: {e}")
+            return None
     def load_video_data(self, file_path):
         
         print(f"🎬 Loading video data from: {os.path.basename(file_path)}")
@@ -942,54 +4028,8 @@ class YTDLPreview:
         except Exception as e:
             print(f"⚠️ Video loading failed: {e}")
             return None
-    def create_media_player_html(self, file_path, media_type, auto_play=False, volume=0.5, speed=1.0):
-        
-        file_url = f"file:///{file_path.replace(os.sep, '/')}"
-        autoplay_attr = "autoplay" if auto_play else ""
-        if media_type == 'video':
-            player_html = f"""
-            <div style="width: 100%; max-width: 640px; margin: 10px auto; background: #2a2a2a; border-radius: 12px; padding: 15px; box-shadow: 0 4px 8px rgba(0,0,0,0.3);">
-                <div style="text-align: center; color: #fff; margin-bottom: 10px; font-family: Arial, sans-serif;">
-                    <h3 style="margin: 0; font-size: 14px; font-weight: 500;">🎬 {os.path.basename(file_path)}</h3>
-                </div>
-                <video controls {autoplay_attr} preload="metadata"
-                       style="width: 100%; height: auto; border-radius: 8px; background: #000;"
-                       onloadstart="this.volume={volume};">
-                    <source src="{file_url}" type="video/mp4">
-                    <source src="{file_url}" type="video/webm">
-                    <source src="{file_url}" type="video/x-matroska">
-                    <p style="color: #fff; text-align: center; padding: 20px;">
-                        Your browser does not support HTML5 video.<br>
-                        <a href="{file_url}" style="color: #4CAF50;">Download video file</a>
-                    </p>
-                </video>
-                <div style="margin-top: 10px; text-align: center; font-size: 12px; color: #aaa;">
-                    Volume: {int(volume * 100)}% | Speed: {speed}x | Auto-play: {'On' if auto_play else 'Off'}
-                </div>
-            </div>
-            
-            <div style="width: 100%; max-width: 500px; margin: 10px auto; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 12px; padding: 20px; box-shadow: 0 4px 12px rgba(0,0,0,0.3);">
-                <div style="text-align: center; color: white; margin-bottom: 15px; font-family: Arial, sans-serif;">
-                    <h3 style="margin: 0; font-size: 16px; font-weight: 500;">🎵 {os.path.basename(file_path)}</h3>
-                </div>
-                <audio controls {autoplay_attr} preload="metadata" style="width: 100%; height: 40px;" onloadstart="this.volume={volume};">
-                    <source src="{file_url}" type="audio/mpeg">
-                    <source src="{file_url}" type="audio/wav">
-                    <source src="{file_url}" type="audio/ogg">
-                    <source src="{file_url}" type="audio/m4a">
-                    <source src="{file_url}" type="audio/flac">
-                    <p style="color: #fff; text-align: center; padding: 10px;">
-                        Your browser does not support HTML5 audio.<br>
-                        <a href="{file_url}" style="color: #fff; text-decoration: underline;">Download audio file</a>
-                    </p>
-                </audio>
-                <div style="margin-top: 15px; text-align: center; font-size: 12px; color: rgba(255,255,255,0.8);">
-                    Volume: {int(volume * 100)}% | Speed: {speed}x | Auto-play: {'On' if auto_play else 'Off'}
-                </div>
-            </div>
-            """
-        return player_html
-    def preview_media(self, downloaded_files: str, file_index: int = 0):
+    def preview_media(self, downloaded_files: str, file_index: int = 0, target_sample_rate: int = 0,
+                      target_channels: int = 0, dtype: str = "float32", decode_audio: bool = True):
         import json
         import torch
         if not downloaded_files or downloaded_files.strip() == "":
@@ -997,7 +4037,7 @@ class YTDLPreview:
             empty_info = {"error": "No files available", "total_files": 0}
             empty_audio = {"waveform": torch.zeros((1, 2, 1024)), "sample_rate": 44100}
             return (empty_audio, [], "", json.dumps(empty_info), 0)
-        file_paths = [path.strip() for path in downloaded_files.split('\n') if path.strip()]
+        file_paths = load_file_list(downloaded_files)
         if not file_paths:
             print("⚠️ No valid file paths found")
             empty_info = {"error": "No valid file paths", "total_files": 0}
@@ -1016,8 +4056,8 @@ class YTDLPreview:
         media_type = self.detect_media_type(current_file)
         audio_data = None
         video_data = None
-        if media_type in ['audio', 'video']:
-            audio_data = self.load_audio_data(current_file)
+        if media_type in ['audio', 'video'] and decode_audio:
+            audio_data = self.load_audio_data(current_file, target_sample_rate, target_channels, dtype)
         if media_type == 'video':
             print(f"✅ Video file available: {os.path.basename(current_file)}")
         else:
@@ -1038,7 +4078,8 @@ class YTDLPreview:
             "duration_seconds": round(duration, 2),
             "current_index": file_index,
             "total_files": len(file_paths),
-            "all_files": [{"index": i, "name": os.path.basename(f), "path": f} for i, f in enumerate(file_paths)],
+            "all_files": [{"index": i, "name": os.path.basename(path), "path": path}
+                          for i, path in ((i, file_paths[i]) for i in listing_window(file_paths, file_index))],
             "controls": {}
         }
         if audio_data:
@@ -1068,7 +4109,19 @@ class YTDLPreview:
         self.create_enhanced_player_display(current_file, media_info)
         if audio_data is None:
             audio_data = {"waveform": torch.zeros((1, 2, 1024)), "sample_rate": 44100}
-        return (audio_data, current_file, json.dumps(media_info, indent=2), len(file_paths))
+        previews = []
+        if resolve_preview_path(current_file):
+            previews.append({
+                "url": preview_url(current_file),
+                "transcode_url": preview_url(current_file, transcode=True),
+                "name": file_name,
+                "type": media_type,
+                "mime": MEDIA_MIME_TYPES[os.path.splitext(current_file)[1].lower()],
+            })
+        else:
+            print(f"⚠️ In-node player only serves media inside the ComfyUI output folder ({preview_root()})")
+        return {"ui": {"ytdl_media": previews},
+                "result": (audio_data, current_file, json.dumps(media_info, indent=2), len(file_paths))}
     def create_enhanced_player_display(self, current_file: str, media_info: dict):
         
         media_type = media_info.get('type', 'unknown')
@@ -1110,15 +4163,280 @@ class YTDLPreview:
         print(f"🔊 Audio Data: Available as AUDIO output for playback nodes")
         print(f"📁 File Path: Available as STRING output for other nodes")
         print("=" * 70)
+class YTDLTranscode:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "downloaded_files": ("STRING", {"forceInput": True}),
+                "target_codec": (list(AUDIO_CODEC_MAP.keys()), {"default": "mp3"}),
+                "bitrate": (["source", "320", "256", "192", "128", "96", "64"], {
+                    "default": "source",
+                    "tooltip": "🎚️ Target bitrate in kbps. 'source' keeps the encoder default. Ignored for wav/flac."
+                }),
+                "sample_rate": (["source", "48000", "44100", "32000", "24000", "22050", "16000"], {"default": "source"}),
+                "loudness_normalize": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "🔊 Apply EBU R128 loudnorm (I=-16, TP=-1.5, LRA=11). Forces a re-encode."
+                }),
+                "stream_copy_if_possible": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "⚡ Remux without re-encoding when the source codec already matches and no filters are requested"
+                }),
+                "skip_up_to_date": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "⏭️ Skip files whose output already exists and is newer than the input"
+                }),
+                "max_workers": ("INT", {"default": 4, "min": 1, "max": 32, "step": 1}),
+            },
+            "optional": {
+                "output_folder": ("STRING", {
+                    "default": "",
+                    "placeholder": "Leave empty to write next to the source files"
+                }),
+            }
+        }
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("transcoded_files", "transcode_info")
+    FUNCTION = "transcode_files"
+    CATEGORY = "audio/ytdl"
+    OUTPUT_NODE = True
+    def build_ffmpeg_command(self, input_path: str, output_path: str, target_codec: str,
+                             bitrate: str, sample_rate: str, loudness_normalize: bool,
+                             stream_copy: bool) -> List[str]:
+        cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-i', input_path, '-vn', '-map', '0:a:0']
+        if stream_copy:
+            cmd.extend(['-c:a', 'copy'])
+        else:
+            encoder = AUDIO_CODEC_MAP[target_codec][0]
+            cmd.extend(['-c:a', encoder])
+            if bitrate != "source" and target_codec not in ('wav', 'flac'):
+                cmd.extend(['-b:a', f'{bitrate}k'])
+            if sample_rate != "source":
+                cmd.extend(['-ar', sample_rate])
+            if loudness_normalize:
+                cmd.extend(['-af', 'loudnorm=I=-16:TP=-1.5:LRA=11'])
+        cmd.append(output_path)
+        return cmd
+    @staticmethod
+    def plan_output_paths(file_paths: List[str], output_dir: Optional[str], target_codec: str) -> dict:
+        planned = {}
+        for input_path in file_paths:
+            base_name, source_ext = os.path.splitext(os.path.basename(input_path))
+            target_dir = output_dir or os.path.dirname(input_path)
+            output_path = os.path.join(target_dir, f"{base_name}.{target_codec}")
+            if os.path.abspath(output_path) == os.path.abspath(input_path):
+                output_path = os.path.join(target_dir, f"{base_name}_transcoded.{target_codec}")
+            planned.setdefault(os.path.abspath(output_path), []).append((input_path, base_name, source_ext, target_dir))
+        outputs = {}
+        for output_path, sources in planned.items():
+            if len(sources) == 1:
+                outputs[sources[0][0]] = output_path
+                continue
+            for input_path, base_name, source_ext, target_dir in sources:
+                outputs[input_path] = os.path.join(
+                    target_dir, f"{base_name}_{source_ext.lstrip('.') or 'source'}.{target_codec}")
+        return outputs
+    def transcode_single_file(self, input_path: str, output_path: str, target_codec: str,
+                              bitrate: str, sample_rate: str, loudness_normalize: bool,
+                              stream_copy_if_possible: bool, skip_up_to_date: bool) -> dict:
+        import time
+        import threading
+        result = {'input': input_path}
+        if not os.path.exists(input_path):
+            result.update({'status': 'failed', 'error': 'Input file not found'})
+            return result
+        result['output'] = output_path
+        if skip_up_to_date and os.path.exists(output_path):
+            if os.path.getmtime(output_path) >= os.path.getmtime(input_path):
+                result['status'] = 'skipped'
+                return result
+        source_stream = probe_audio_codec(input_path)
+        if source_stream is None:
+            result.update({'status': 'failed', 'error': 'No audio stream found'})
+            return result
+        source_codec = source_stream.get('codec_name')
+        wants_filters = loudness_normalize or sample_rate != "source" or bitrate != "source"
+        stream_copy = (stream_copy_if_possible and not wants_filters
+                       and source_codec == AUDIO_CODEC_MAP[target_codec][1])
+        output_dir, output_name = os.path.split(output_path)
+        temp_path = os.path.join(output_dir, f".{output_name}.{os.getpid()}-{threading.get_ident()}.part.{target_codec}")
+        cmd = self.build_ffmpeg_command(input_path, temp_path, target_codec, bitrate,
+                                        sample_rate, loudness_normalize, stream_copy)
+        started = time.time()
+        try:
+            subprocess.run(cmd, capture_output=True, check=True)
+            os.replace(temp_path, output_path)
+        except subprocess.CalledProcessError as e:
+            error_output = e.stderr.decode('utf-8', errors='replace').strip() if e.stderr else str(e)
+            result.update({'status': 'failed', 'error': error_output[-500:]})
+            return result
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        result.update({
+            'status': 'success',
+            'mode': 'copy' if stream_copy else 'encode',
+            'source_codec': source_codec,
+            'file_size': os.path.getsize(output_path),
+            'elapsed_seconds': round(time.time() - started, 3),
+        })
+        return result
+    def transcode_files(self, downloaded_files: str, target_codec: str, bitrate: str,
+                        sample_rate: str, loudness_normalize: bool, stream_copy_if_possible: bool,
+                        skip_up_to_date: bool, max_workers: int, output_folder: str = ""):
+        from concurrent.futures import ThreadPoolExecutor
+        file_paths = list(load_file_list(downloaded_files))
+        if not file_paths:
+            print("⚠️ No files to transcode")
+            return ("", json.dumps({"error": "No files available", "results": []}))
+        if not check_ffmpeg():
+            print("❌ Transcoding requires ffmpeg. Please install ffmpeg and try again.")
+            return ("", json.dumps({"error": "ffmpeg not found", "results": []}))
+        output_dir = None
+        if output_folder and output_folder.strip():
+            output_dir = output_folder.strip().rstrip('/\\')
+            if not os.path.isabs(output_dir):
+                output_dir = os.path.join(os.getcwd(), output_dir)
+            os.makedirs(output_dir, exist_ok=True)
+        file_paths = list(dict.fromkeys(file_paths))
+        output_paths = self.plan_output_paths(file_paths, output_dir, target_codec)
+        print(f"🔄 Transcoding {len(file_paths)} file(s) to {target_codec} with {max_workers} worker(s)")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(
+                lambda path: self.transcode_single_file(
+                    path, output_paths[path], target_codec, bitrate, sample_rate,
+                    loudness_normalize, stream_copy_if_possible, skip_up_to_date),
+                file_paths))
+        output_files = []
+        for result in results:
+            name = os.path.basename(result['input'])
+            if result['status'] == 'success':
+                print(f"✅ {name} → {result['mode']}")
+                output_files.append(result['output'])
+            elif result['status'] == 'skipped':
+                print(f"⏭️ {name} is up to date")
+                output_files.append(result['output'])
+            else:
+                print(f"❌ {name}: {result.get('error', 'Unknown error')}")
+        summary = {
+            'summary': {
+                'total': len(results),
+                'encoded': sum(1 for r in results if r.get('mode') == 'encode'),
+                'copied': sum(1 for r in results if r.get('mode') == 'copy'),
+                'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+                'failed': sum(1 for r in results if r['status'] == 'failed'),
+                'target_codec': target_codec,
+            },
+            'results': results
+        }
+        return ('\n'.join(output_files), json.dumps(summary, indent=2))
+MEDIA_MIME_TYPES = {
+    '.mp3': 'audio/mpeg', '.m4a': 'audio/mp4', '.aac': 'audio/aac', '.wav': 'audio/wav', '.flac': 'audio/flac',
+    '.ogg': 'audio/ogg', '.opus': 'audio/ogg', '.webm': 'video/webm', '.mp4': 'video/mp4', '.m4v': 'video/mp4',
+    '.mkv': 'video/x-matroska', '.mov': 'video/quicktime', '.avi': 'video/x-msvideo', '.flv': 'video/x-flv',
+}
+def preview_root() -> str:
+    try:
+        import folder_paths
+        return os.path.realpath(folder_paths.get_output_directory())
+    except Exception:
+        return os.path.realpath(os.path.join(os.getcwd(), 'output'))
+def preview_url(file_path: str, transcode: bool = False) -> str:
+    from urllib.parse import quote
+    return f"/ytdl/media?path={quote(os.path.abspath(file_path))}{'&transcode=1' if transcode else ''}"
+def resolve_preview_path(path: str) -> Optional[str]:
+    if not path:
+        return None
+    real_path = os.path.realpath(path)
+    if os.path.splitext(real_path)[1].lower() not in MEDIA_MIME_TYPES or not os.path.isfile(real_path):
+        return None
+    if not real_path.startswith(preview_root() + os.sep):
+        return None
+    return real_path
+def transcode_command(file_path: str, media_type: str, start: float = 0.0) -> List[str]:
+    cmd = ['ffmpeg', '-v', 'error']
+    if start:
+        cmd += ['-ss', str(start)]
+    cmd += ['-i', file_path]
+    if media_type == 'video':
+        return cmd + ['-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency', '-c:a', 'aac', '-b:a', '128k',
+                      '-movflags', 'frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4', 'pipe:1']
+    return cmd + ['-vn', '-c:a', 'libopus', '-b:a', '96k', '-f', 'webm', 'pipe:1']
+def register_preview_routes() -> bool:
+    if 'server' not in sys.modules:
+        return False
+    try:
+        from aiohttp import web
+        from server import PromptServer
+        routes = PromptServer.instance.routes
+    except Exception:
+        return False
+    @routes.get('/ytdl/media')
+    async def serve_media(request):
+        file_path = resolve_preview_path(request.query.get('path', ''))
+        if file_path is None:
+            return web.Response(status=404, text="Media file not found in the ComfyUI output folder")
+        ext = os.path.splitext(file_path)[1].lower()
+        if request.query.get('transcode') not in ('1', 'true'):
+            return web.FileResponse(file_path, headers={'Cache-Control': 'no-cache', 'Accept-Ranges': 'bytes',
+                                                        'Content-Type': MEDIA_MIME_TYPES[ext]})
+        import asyncio
+        if not check_ffmpeg():
+            return web.Response(status=501, text="Transcoding requires ffmpeg")
+        media_type = 'video' if ext in VIDEO_EXTENSIONS and request.query.get('audio_only') not in ('1', 'true') else 'audio'
+        try:
+            start = max(0.0, float(request.query.get('start', 0) or 0))
+        except ValueError:
+            start = 0.0
+        process = await asyncio.create_subprocess_exec(
+            *transcode_command(file_path, media_type, start),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        response = web.StreamResponse(headers={
+            'Content-Type': 'video/mp4' if media_type == 'video' else 'audio/webm',
+            'Cache-Control': 'no-cache',
+        })
+        await response.prepare(request)
+        try:
+            while True:
+                chunk = await process.stdout.read(64 * 1024)
+                if not chunk:
+                    break
+                await response.write(chunk)
+            await response.write_eof()
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+        return response
+    print("🔊 YTDL media preview route registered at /ytdl/media")
+    return True
 NODE_CLASS_MAPPINGS = {
     "YTDLLinksInput": YTDLLinksInput,
+    "YTDLLinksFromFile": YTDLLinksFromFile,
     "YTDLDownloader": YTDLDownloader,
+    "YTDLMetadata": YTDLMetadata,
+    "YTDLThumbnails": YTDLThumbnails,
+    "YTDLStreamAudio": YTDLStreamAudio,
+    "YTDLBatchAudio": YTDLBatchAudio,
     "YTDLPreviewAudio": YTDLPreviewAudio,
     "YTDLPreview": YTDLPreview,
+    "YTDLTranscode": YTDLTranscode,
+    "YTDLLibrary": YTDLLibrary,
 }
 NODE_DISPLAY_NAME_MAPPINGS = {
     "YTDLLinksInput": "YTDL Links Input",
+    "YTDLLinksFromFile": "YTDL Links From File",
     "YTDLDownloader": "YTDL Downloader",
+    "YTDLMetadata": "YTDL Metadata",
+    "YTDLThumbnails": "YTDL Thumbnails & Storyboards",
+    "YTDLStreamAudio": "YTDL Stream Audio",
+    "YTDLBatchAudio": "YTDL Batch Audio",
     "YTDLPreviewAudio": "YTDL Preview Audio (Legacy)",
     "YTDLPreview": "YTDL Preview",
+    "YTDLTranscode": "YTDL Transcode",
+    "YTDLLibrary": "YTDL Library",
 }
+register_preview_routes()